@@ -2,32 +2,111 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
 import os
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from dotenv import load_dotenv
 
 import httpx
 
+from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, circuit_breakers
+from app.services.http_clients import host_of, http_clients
+from app.services.model_registry import ModelRegistry
+from app.services.prompt_builder import BuiltPrompt, PromptBuilder
+from app.services.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded
+from app.services.response_cache import TTLCache, normalize_prompt
+from app.services.single_flight import SingleFlight
+from app.services.telemetry import ai_telemetry
+
+logger = logging.getLogger(__name__)
+
 # Load .env file from the backend directory
 backend_dir = Path(__file__).parent
 env_path = backend_dir / ".env"
 load_dotenv(dotenv_path=env_path)
 
-CLAUDE_API_URL = "https://api.anthropic.com/v1/messages"
+CLAUDE_API_URL = settings.CLAUDE_API_URL
+# Models endpoint lives next to the Messages endpoint (…/v1/messages -> …/v1/models)
+CLAUDE_MODELS_URL = CLAUDE_API_URL.rsplit("/", 1)[0] + "/models"
+
+# Token counters reported in Messages API `usage` (the cache_* ones need prompt caching)
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+# Claude requests share this host's keep-alive pool in the client registry, so they
+# don't pay a new TCP+TLS handshake each time (limits: CLAUDE_HTTP_* settings).
+CLAUDE_HOST = host_of(CLAUDE_API_URL)
+
+
+# Completed answers keyed by (normalized prompt, model, temperature, max_tokens)
+response_cache = TTLCache(
+    max_entries=settings.CLAUDE_RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CLAUDE_RESPONSE_CACHE_TTL,
+    max_bytes=settings.CLAUDE_RESPONSE_CACHE_MAX_BYTES,
+)
+
+# Models that recently returned 404 are skipped until their cooldown ends
+model_registry = ModelRegistry(cooldown_seconds=settings.CLAUDE_MODEL_COOLDOWN)
+
+# Shared by every Claude caller: queues requests instead of failing on 429/529
+rate_limiter = AdaptiveRateLimiter(
+    requests_per_minute=settings.CLAUDE_RATE_LIMIT_RPM,
+    burst=settings.CLAUDE_RATE_LIMIT_BURST,
+    max_concurrency=settings.CLAUDE_MAX_CONCURRENCY,
+    max_queue_depth=settings.CLAUDE_QUEUE_MAX_DEPTH,
+    max_wait_seconds=settings.CLAUDE_QUEUE_MAX_WAIT,
+)
+
+# Identical prompts already in flight share one upstream request
+inflight_requests = SingleFlight()
 
 
 class ClaudeClientError(RuntimeError):
     """Raised when the Claude API returns an error response."""
 
 
+class ClaudeRateLimitError(ClaudeClientError):
+    """Raised when a request is shed by the outbound rate limiter or is still
+    throttled upstream (429/529) once its retries are used up."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared Claude HTTP client.
+
+    The client is normally opened by the app lifespan; callers outside the app
+    (scripts, the MCP server) get one created lazily on first use.
+    """
+    return http_clients.client(CLAUDE_HOST)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Return connection pool statistics for the shared Claude client."""
+    return http_clients.pool_stats(CLAUDE_HOST)
+
+
 def get_api_key() -> str:
     """Return the Claude API key from the environment.
 
     Raises:
         ClaudeClientError: If the key is not configured.
     """
-    api_key = os.getenv("ANTHROPIC_API_KEY")
+    api_key = os.getenv("ANTHROPIC_API_KEY") or settings.ANTHROPIC_API_KEY or settings.CLAUDE_API_KEY
     if not api_key:
         raise ClaudeClientError(
             "Claude API key missing. Set the ANTHROPIC_API_KEY environment variable."
@@ -35,82 +114,262 @@ def get_api_key() -> str:
     return api_key
 
 
+# System message to encourage well-formatted responses
+SYSTEM_MESSAGE = (
+    "You are a helpful assistant. Please format your responses clearly and professionally. "
+    "Use bullet points (- or *) for lists when appropriate, numbered lists (1. 2. 3.) for step-by-step instructions, "
+    "and **bold text** for emphasis. Keep responses concise, well-structured, and easy to read. "
+    "Use paragraphs to separate different ideas."
+)
+
+
+def _candidate_models(model: Optional[str]) -> List[str]:
+    """Return the full model fallback chain for a request."""
+    # Try models in order of preference (latest first)
+    # Latest models as of 2025: Claude 3.5 Sonnet is the most recent stable release
+    model_candidates = [
+        model,  # User-specified model
+        os.getenv("CLAUDE_MODEL"),  # Environment variable
+        "claude-3-5-haiku-20241022",  # Latest Claude 3.5 Haiku (fastest)
+    ]
+
+    # Filter out None values and get the first available
+    models_to_try = list(dict.fromkeys(m for m in model_candidates if m))
+    if not models_to_try:
+        models_to_try = ["claude-3-5-sonnet-20241022"]  # Default to latest
+    return models_to_try
+
+
+def _models_to_try(model: Optional[str]) -> List[str]:
+    """Return the fallback chain minus models that 404'd recently."""
+    return model_registry.filter(_candidate_models(model))
+
+
+async def _model_exists(model_name: str) -> bool:
+    """Check a model id against the Models API (cheap, no tokens spent)."""
+    response = await get_http_client().get(
+        f"{CLAUDE_MODELS_URL}/{model_name}", headers=_build_headers()
+    )
+    if response.status_code == 404:
+        return False
+    if response.status_code >= 400:
+        raise ClaudeClientError(
+            f"Claude API error ({response.status_code}): {_error_detail(response)}"
+        )
+    return True
+
+
+async def probe_models(model: Optional[str] = None) -> Dict[str, bool]:
+    """Probe every candidate model concurrently and record which are usable.
+
+    Called once at startup so the first chat request doesn't pay for a 404.
+    """
+    candidates = _candidate_models(model)
+    try:
+        get_api_key()
+    except ClaudeClientError:
+        return {}
+    return await model_registry.probe(candidates, _model_exists)
+
+
+def _is_cacheable(temperature: float) -> bool:
+    """Sampled (temperature > 0) answers are only cached when opted in."""
+    if not settings.CLAUDE_RESPONSE_CACHE_ENABLED:
+        return False
+    return temperature <= 0 or settings.CLAUDE_RESPONSE_CACHE_SAMPLED
+
+
+def _build_headers() -> Dict[str, str]:
+    return {
+        "x-api-key": get_api_key(),
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json",
+    }
+
+
+def _error_detail(response: httpx.Response) -> str:
+    """Extract a readable error message from a Claude error response."""
+    try:
+        error_data = response.json().get("error", {})
+        return error_data.get("message") or error_data.get("type", "Unknown error")
+    except Exception:
+        return response.text or "Unknown error"
+
+
+@dataclass
+class ClaudeResult:
+    """A completed Claude response with its token usage."""
+
+    text: str
+    model: Optional[str] = None
+    usage: Dict[str, int] = field(default_factory=dict)
+    cached: bool = False  # Served from the local response cache
+    tier: Optional[str] = None  # Routing tier that answered, if routed
+
+
 async def generate_claude_response(
-    prompt: str,
+    prompt: Union[str, BuiltPrompt],
     *,
     model: Optional[str] = None,
     max_tokens: int = 1024,
     temperature: float = 0.2,
+    system: str = SYSTEM_MESSAGE,
+    use_cache: bool = True,
 ) -> str:
     """Generate a response from Claude given a user prompt.
     
+    Identical concurrent calls are coalesced into a single upstream request.
+
     Args:
-        prompt: User's question or prompt
+        prompt: User's question, or a prompt built with PromptBuilder
         model: Model name (defaults to environment variable or fallback models)
         max_tokens: Maximum tokens in response
         temperature: Sampling temperature
+        system: System prompt sent with a plain string prompt
+        use_cache: Serve/store the answer in the response cache when allowed
         
     Returns:
         Claude's response text
     """
-    # Try models in order of preference (latest first)
-    # Latest models as of 2025: Claude 3.5 Sonnet is the most recent stable release
-    model_candidates = [
-        model,  # User-specified model
-        os.getenv("CLAUDE_MODEL"),  # Environment variable
-        "claude-3-5-haiku-20241022",  # Latest Claude 3.5 Haiku (fastest)
-    ]
-    
-    # Filter out None values and get the first available
-    models_to_try = [m for m in model_candidates if m]
-    if not models_to_try:
-        models_to_try = ["claude-3-5-sonnet-20241022"]  # Default to latest
-    
-    api_key = get_api_key()
-    headers = {
-        "x-api-key": api_key,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json",
-    }
+    result = await generate_claude_message(
+        prompt,
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        system=system,
+        use_cache=use_cache,
+    )
+    return result.text
 
-    last_error: Optional[str] = None
-    
-    # System message to encourage well-formatted responses
-    system_message = (
-        "You are a helpful assistant. Please format your responses clearly and professionally. "
-        "Use bullet points (- or *) for lists when appropriate, numbered lists (1. 2. 3.) for step-by-step instructions, "
-        "and **bold text** for emphasis. Keep responses concise, well-structured, and easy to read. "
-        "Use paragraphs to separate different ideas."
+
+async def generate_claude_message(
+    prompt: Union[str, BuiltPrompt],
+    *,
+    model: Optional[str] = None,
+    max_tokens: int = 1024,
+    temperature: float = 0.2,
+    system: str = SYSTEM_MESSAGE,
+    use_cache: bool = True,
+) -> ClaudeResult:
+    """Like :func:`generate_claude_response`, but also returns model and token usage.
+
+    ``usage`` includes ``cache_read_input_tokens`` and
+    ``cache_creation_input_tokens`` so callers can confirm prompt caching works.
+    """
+    built = build_prompt(prompt, system)
+    models_to_try = _models_to_try(model)
+
+    cache_key = None
+    if use_cache and _is_cacheable(temperature):
+        cache_key = (
+            normalize_prompt(built.question), built.prefix_hash, models_to_try[0], temperature, max_tokens
+        )
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return ClaudeResult(text=cached.text, model=cached.model, cached=True)
+
+    # Keyed by the full payload so only truly identical requests share a result
+    flight_key = (built.fingerprint(), tuple(models_to_try), max_tokens, temperature)
+    result = await inflight_requests.do(
+        flight_key,
+        lambda: _request_completion(
+            built, models_to_try, max_tokens=max_tokens, temperature=temperature
+        ),
+    )
+
+    if cache_key is not None:
+        response_cache.set(cache_key, result, size=len(result.text))
+    return result
+
+
+def build_prompt(prompt: Union[str, BuiltPrompt], system: str = SYSTEM_MESSAGE) -> BuiltPrompt:
+    """Turn a plain question into a stable-first prompt.
+
+    The system block is only marked for caching when it reaches
+    CLAUDE_PROMPT_CACHE_MIN_TOKENS; SYSTEM_MESSAGE alone is far shorter, so a
+    one-off question is sent uncached rather than with a breakpoint the API ignores.
+    """
+    if isinstance(prompt, BuiltPrompt):
+        return prompt
+    builder = PromptBuilder(
+        system=system,
+        cache=settings.CLAUDE_PROMPT_CACHING,
+        min_cache_tokens=settings.CLAUDE_PROMPT_CACHE_MIN_TOKENS,
+    )
+    return builder.set_question(prompt).build()
+
+
+async def _request_completion(
+    prompt: BuiltPrompt,
+    models_to_try: List[str],
+    *,
+    max_tokens: int,
+    temperature: float,
+) -> ClaudeResult:
+    """Call the Messages API, falling back through models_to_try on 404.
+
+    Latency, time to first byte, token usage, fallback attempts and error
+    class are recorded in ``ai_telemetry`` against the answering model.
+    """
+    trace: Dict[str, Any] = {"model": models_to_try[0] if models_to_try else "unknown", "ttfb": None, "fallbacks": 0}
+    started = time.perf_counter()
+    try:
+        result = await _send_completion(
+            prompt, models_to_try, trace, max_tokens=max_tokens, temperature=temperature
+        )
+    except BaseException as exc:
+        _record_call(trace, started, error=type(exc).__name__)
+        raise
+    _record_call(trace, started, usage=result.usage)
+    return result
+
+
+def _record_call(trace: Dict[str, Any], started: float, **kwargs: Any) -> None:
+    ai_telemetry.record_call(
+        trace["model"],
+        time.perf_counter() - started,
+        ttfb=trace["ttfb"],
+        fallback_attempts=trace["fallbacks"],
+        **kwargs,
     )
+
+
+async def _send_completion(
+    prompt: BuiltPrompt,
+    models_to_try: List[str],
+    trace: Dict[str, Any],
+    *,
+    max_tokens: int,
+    temperature: float,
+) -> ClaudeResult:
+    headers = _build_headers()
+
+    last_error: Optional[str] = None
     
     for model_name in models_to_try:
         payload: Dict[str, Any] = {
             "model": model_name,
             "max_tokens": max_tokens,
             "temperature": temperature,
-            "system": system_message,
-            "messages": [{"role": "user", "content": prompt}],
+            "system": prompt.system,
+            "messages": prompt.messages,
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(CLAUDE_API_URL, headers=headers, json=payload)
+        trace["model"] = model_name
+        response, trace["ttfb"] = await _post_message(get_http_client(), headers, payload)
 
         if response.status_code < 400:
             # Success - break out of the loop
+            model_registry.mark_available(model_name)
             break
             
-        # Extract error details
-        detail: Optional[str] = None
-        try:
-            error_data = response.json().get("error", {})
-            detail = error_data.get("message") or error_data.get("type", "Unknown error")
-        except Exception:
-            detail = response.text or "Unknown error"
-        
+        detail = _error_detail(response)
         last_error = f"Model {model_name}: {detail}"
         
         # If it's a 404 (model not found), try the next model
         if response.status_code == 404:
+            model_registry.mark_unavailable(model_name, detail)
+            trace["fallbacks"] += 1
             continue
         else:
             # For other errors, raise immediately
@@ -137,5 +396,347 @@ async def generate_claude_response(
     combined = "\n".join(filter(None, text_blocks)).strip()
     if not combined:
         raise ClaudeClientError("Claude API response did not include any text blocks.")
-    return combined
+    return ClaudeResult(text=combined, model=data.get("model", model_name), usage=_usage(data.get("usage")))
+
+
+def _usage(raw: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Normalize a Messages API usage object, including prompt-cache counters."""
+    raw = raw or {}
+    return {key: int(raw.get(key) or 0) for key in USAGE_FIELDS}
+
+
+# ---------------------------------------------------------------------------
+# Latency-based model routing
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class ModelTier:
+    """A routing target: which model to use and how long to wait for it."""
+
+    name: str
+    model: str
+    timeout: float
+
+
+FAST_TIER = ModelTier("fast", settings.CLAUDE_FAST_MODEL, settings.CLAUDE_FAST_TIMEOUT)
+QUALITY_TIER = ModelTier("quality", settings.CLAUDE_QUALITY_MODEL, settings.CLAUDE_QUALITY_TIMEOUT)
+
+# Asking for reasoning, writing or planning needs the larger model
+_DETAIL_RE = re.compile(
+    r"\b(explain|why|analy[sz]e|compare|design|plan|strategy|detailed|in detail|"
+    r"step[- ]by[- ]step|write|draft|generate|review|recommend|pros and cons|trade-?offs?|breakdown)\b",
+    re.IGNORECASE,
+)
+# Short factual lookups ("how many open issues?", "who owns PROJ-12?")
+_LOOKUP_RE = re.compile(
+    r"^\s*(what|who|when|where|which|how many|how much|is|are|does|do|did|list|show|count|status)\b",
+    re.IGNORECASE,
+)
+
+routing_stats: Dict[str, int] = {
+    "fast": 0, "quality": 0, "hedged": 0, "hedge_wins": 0, "fallbacks": 0, "hedges_skipped": 0,
+}
+
+
+def classify_prompt(prompt: str) -> ModelTier:
+    """Pick a tier for a prompt using cheap local heuristics (no API call)."""
+    words = len(prompt.split())
+    if words > settings.CLAUDE_FAST_MAX_WORDS or prompt.count("\n") > 3 or _DETAIL_RE.search(prompt):
+        return QUALITY_TIER
+    if _LOOKUP_RE.match(prompt) or words <= 8:
+        return FAST_TIER
+    return QUALITY_TIER
+
+
+async def generate_routed_message(
+    prompt: Union[str, BuiltPrompt],
+    *,
+    max_tokens: int = 1024,
+    temperature: float = 0.2,
+    system: str = SYSTEM_MESSAGE,
+    use_cache: bool = True,
+) -> ClaudeResult:
+    """Route a prompt to the fast or quality tier and return the result.
+
+    Quality-tier requests are hedged: if the quality model hasn't answered
+    within ``CLAUDE_HEDGE_AFTER`` seconds, the same prompt is sent to the fast
+    tier and whichever answers first wins. A failing quality tier falls back
+    to the fast tier.
+
+    Throttling is not a failure to route around: a ClaudeRateLimitError (shed
+    locally, or upstream 429/529 after retries) propagates without a fallback,
+    and no hedge is sent while the API has us paused, since both would only add
+    load to an account that is already being throttled.
+    """
+    kwargs = dict(max_tokens=max_tokens, temperature=temperature, system=system, use_cache=use_cache)
+    if not settings.CLAUDE_ROUTING_ENABLED:
+        return await generate_claude_message(prompt, **kwargs)
+
+    question = prompt.query if isinstance(prompt, BuiltPrompt) else prompt
+    tier = classify_prompt(question)
+    routing_stats[tier.name] += 1
+    if tier is FAST_TIER:
+        return await _call_tier(FAST_TIER, prompt, **kwargs)
+
+    primary = asyncio.ensure_future(_call_tier(QUALITY_TIER, prompt, **kwargs))
+    hedge: Optional[asyncio.Future] = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=settings.CLAUDE_HEDGE_AFTER)
+        if primary in done:
+            if primary.exception() is None:
+                return primary.result()
+            if isinstance(primary.exception(), ClaudeRateLimitError):
+                raise primary.exception()
+            routing_stats["fallbacks"] += 1
+            logger.warning(f"Quality tier failed ({primary.exception()}); falling back to fast tier")
+            return await _call_tier(FAST_TIER, prompt, **kwargs)
+
+        if rate_limiter.is_throttled():
+            # The quality call is likely waiting out a 429/529; a hedge would add to the load
+            routing_stats["hedges_skipped"] += 1
+            return await primary
+
+        # Quality tier is over its latency budget; race it against the fast tier
+        routing_stats["hedged"] += 1
+        hedge = asyncio.ensure_future(_call_tier(FAST_TIER, prompt, **kwargs))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        routing_stats["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+async def _call_tier(tier: ModelTier, prompt: Union[str, BuiltPrompt], **kwargs: Any) -> ClaudeResult:
+    try:
+        result = await asyncio.wait_for(
+            generate_claude_message(prompt, model=tier.model, **kwargs), timeout=tier.timeout
+        )
+    except asyncio.TimeoutError as exc:
+        raise ClaudeClientError(
+            f"Claude {tier.name} tier ({tier.model}) timed out after {tier.timeout:.0f}s"
+        ) from exc
+    return replace(result, tier=tier.name)
+
+
+async def stream_claude_response(
+    prompt: Union[str, BuiltPrompt],
+    *,
+    model: Optional[str] = None,
+    max_tokens: int = 1024,
+    temperature: float = 0.2,
+    system: str = SYSTEM_MESSAGE,
+    usage: Optional[Dict[str, int]] = None,
+) -> AsyncIterator[str]:
+    """Stream a Claude response, yielding text deltas as they arrive.
+
+    Uses the same model fallback chain and error mapping as
+    :func:`generate_claude_response`. Fallback only happens before the first
+    delta is produced; closing the generator closes the upstream stream.
+
+    Args:
+        usage: Optional dict updated in place with token usage as it is reported
+
+    Raises:
+        ClaudeClientError: On API errors, including ``error`` events mid-stream.
+    """
+    built = build_prompt(prompt, system)
+    models_to_try = _models_to_try(model)
+    usage = usage if usage is not None else {}
+    trace: Dict[str, Any] = {"model": models_to_try[0] if models_to_try else "unknown", "ttfb": None, "fallbacks": 0}
+    started = time.perf_counter()
+    error: Optional[str] = None
+    deltas = _stream_completion(built, models_to_try, trace, usage, max_tokens, temperature)
+    try:
+        async for text in deltas:
+            if trace["ttfb"] is None:
+                # For streams, time to first token is what the user feels
+                trace["ttfb"] = time.perf_counter() - started
+            yield text
+    except BaseException as exc:
+        # GeneratorExit/CancelledError when the consumer goes away mid-stream
+        error = type(exc).__name__
+        raise
+    finally:
+        # Close the upstream stream now rather than whenever the inner generator is collected
+        await deltas.aclose()
+        _record_call(trace, started, usage=usage, error=error, stream=True)
+
+
+async def _stream_completion(
+    built: BuiltPrompt,
+    models_to_try: List[str],
+    trace: Dict[str, Any],
+    usage: Dict[str, int],
+    max_tokens: int,
+    temperature: float,
+) -> AsyncIterator[str]:
+    headers = _build_headers()
+    client = get_http_client()
+
+    last_error: Optional[str] = None
+
+    for model_name in models_to_try:
+        trace["model"] = model_name
+        payload: Dict[str, Any] = {
+            "model": model_name,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": built.system,
+            "messages": built.messages,
+            "stream": True,
+        }
+
+        async with _open_stream(client, headers, payload) as response:
+            if response.status_code >= 400:
+                detail = _error_detail(response)
+                last_error = f"Model {model_name}: {detail}"
+                # If it's a 404 (model not found), try the next model
+                if response.status_code == 404:
+                    model_registry.mark_unavailable(model_name, detail)
+                    trace["fallbacks"] += 1
+                    continue
+                raise ClaudeClientError(
+                    f"Claude API error ({response.status_code}): {detail or 'Unknown error'}"
+                )
+
+            model_registry.mark_available(model_name)
+            async for event in _iter_sse_events(response):
+                event_type = event.get("type")
+                if event_type == "content_block_delta":
+                    delta = event.get("delta", {})
+                    if delta.get("type") == "text_delta" and delta.get("text"):
+                        yield delta["text"]
+                elif event_type in ("message_start", "message_delta"):
+                    reported = event.get("message", {}).get("usage") or event.get("usage") or {}
+                    usage.update({k: int(v) for k, v in reported.items() if k in USAGE_FIELDS and v is not None})
+                elif event_type == "error":
+                    error_data = event.get("error", {})
+                    detail = error_data.get("message") or error_data.get("type", "Unknown error")
+                    raise ClaudeClientError(f"Claude API stream error: {detail}")
+                elif event_type == "message_stop":
+                    break
+            return
+
+    # All models failed
+    raise ClaudeClientError(
+        f"All model attempts failed. Last error: {last_error or 'Unknown error'}"
+    )
+
+
+async def _post_message(
+    client: httpx.AsyncClient, headers: Dict[str, str], payload: Dict[str, Any]
+) -> Tuple[httpx.Response, float]:
+    """POST to the Messages API through the shared rate limiter.
+
+    Throttled responses (429/529) are retried after their ``retry-after``
+    instead of failing, as long as the request's queue deadline allows.
+
+    Returns:
+        The response (body read) and its time to first byte in seconds
+
+    Raises:
+        ClaudeRateLimitError: If the deadline passes or the last retry is still throttled
+    """
+    deadline = rate_limiter.deadline()
+    for attempt in range(settings.CLAUDE_RATE_LIMIT_MAX_RETRIES + 1):
+        async with _limiter_slot(deadline), _circuit() as breaker:
+            sent = time.perf_counter()
+            async with client.stream("POST", CLAUDE_API_URL, headers=headers, json=payload) as response:
+                ttfb = time.perf_counter() - sent
+                await response.aread()
+            breaker.record_status(response.status_code)
+        retry_after = rate_limiter.record_response(response.status_code, response.headers)
+        if retry_after is None:
+            return response, ttfb
+    raise _throttled(response, retry_after)
+
+
+@asynccontextmanager
+async def _open_stream(
+    client: httpx.AsyncClient, headers: Dict[str, str], payload: Dict[str, Any]
+) -> AsyncIterator[httpx.Response]:
+    """Open a streaming Messages API request, holding a limiter slot while it runs.
+
+    Error responses are read in full before being yielded. Throttling that outlasts
+    the retries raises ClaudeRateLimitError, as in :func:`_post_message`.
+    """
+    deadline = rate_limiter.deadline()
+    for attempt in range(settings.CLAUDE_RATE_LIMIT_MAX_RETRIES + 1):
+        async with _limiter_slot(deadline), _circuit() as breaker:
+            async with client.stream("POST", CLAUDE_API_URL, headers=headers, json=payload) as response:
+                breaker.record_status(response.status_code)
+                if response.status_code >= 400:
+                    await response.aread()
+                retry_after = rate_limiter.record_response(response.status_code, response.headers)
+                if retry_after is None:
+                    yield response
+                    return
+                if attempt == settings.CLAUDE_RATE_LIMIT_MAX_RETRIES:
+                    raise _throttled(response, retry_after)
+
+
+def _throttled(response: httpx.Response, retry_after: float) -> ClaudeRateLimitError:
+    detail = _error_detail(response)
+    return ClaudeRateLimitError(
+        f"Claude API throttled ({response.status_code}): {detail or 'Unknown error'}", retry_after=retry_after
+    )
+
+
+@asynccontextmanager
+async def _limiter_slot(deadline: Optional[float] = None) -> AsyncIterator[None]:
+    try:
+        await rate_limiter.acquire(deadline)
+    except RateLimitExceeded as exc:
+        raise ClaudeRateLimitError(str(exc), retry_after=exc.retry_after) from exc
+    try:
+        yield
+    finally:
+        rate_limiter.release()
+
+
+@asynccontextmanager
+async def _circuit() -> AsyncIterator[CircuitBreaker]:
+    """Fail fast while the Claude host's circuit is open; transport errors count against it.
+
+    Callers report the response status through the yielded breaker.
+    """
+    breaker = circuit_breakers.breaker(CLAUDE_HOST)
+    try:
+        breaker.allow()
+    except CircuitOpenError as exc:
+        raise ClaudeClientError(f"Claude API unavailable: {exc}") from exc
+    try:
+        yield breaker
+    except httpx.TransportError as exc:
+        breaker.record_failure(type(exc).__name__)
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+
 
+async def _iter_sse_events(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """Parse the server-sent events of a streaming Messages API response."""
+    data_lines: List[str] = []
+    async for line in response.aiter_lines():
+        if line.startswith("data:"):
+            data_lines.append(line[5:].strip())
+        elif not line and data_lines:
+            # A blank line terminates the event
+            raw = "\n".join(data_lines)
+            data_lines = []
+            try:
+                yield json.loads(raw)
+            except json.JSONDecodeError:
+                continue
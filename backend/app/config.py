@@ -15,6 +15,66 @@ class Settings(BaseSettings):
     JIRA_EMAIL: str = ""
     JIRA_API_TOKEN: str = ""
     
+    # GitHub issue pagination: pages after the first are fetched concurrently
+    GITHUB_PER_PAGE: int = 100
+    GITHUB_PAGE_CONCURRENCY: int = 4
+    GITHUB_MAX_PAGES: int = 50
+    GITHUB_HTTP_TIMEOUT: float = 15.0
+    GITHUB_HTTP_MAX_CONNECTIONS: int = 8
+    GITHUB_HTTP_MAX_KEEPALIVE: int = 4
+    GITHUB_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Jira issue search: "token" walks /search/jql by nextPageToken; "offset" uses
+    # /search with startAt and fetches pages concurrently once the total is known
+    JIRA_SEARCH_MODE: str = "token"
+    JIRA_FIELDS: str = "summary,status,assignee,priority,labels,issuetype,created,updated"
+    JIRA_PAGE_SIZE: int = 100
+    JIRA_PAGE_CONCURRENCY: int = 4
+    JIRA_MAX_PAGES: int = 100
+    JIRA_HTTP_TIMEOUT: float = 15.0
+    JIRA_HTTP_MAX_CONNECTIONS: int = 8
+    JIRA_HTTP_MAX_KEEPALIVE: int = 4
+    JIRA_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Sources merged into /api/issues and /api/stats (comma-separated)
+    GITHUB_REPOSITORIES: str = ""  # e.g. "octocat/hello-world,octocat/spoon-knife"
+    GITHUB_ISSUE_STATE: str = "all"
+    JIRA_PROJECT_KEYS: str = ""  # e.g. "DEV,OPS"
+    # Merged issues are served from memory; past the fresh TTL they are refreshed in the
+    # background, past the stale TTL callers wait for the refresh
+    ISSUES_CACHE_FRESH_TTL: float = 60.0
+    ISSUES_CACHE_STALE_TTL: float = 900.0
+    
+    # Upstream resilience (per host): the circuit opens after CIRCUIT_FAILURE_THRESHOLD
+    # consecutive 5xx / transport failures and fails fast for CIRCUIT_RESET_TIMEOUT seconds.
+    # Idempotent GETs are retried with jittered exponential backoff; retries are capped at
+    # UPSTREAM_RETRY_BUDGET_RATIO of calls (banked up to UPSTREAM_RETRY_BUDGET_BURST)
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT: float = 30.0
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = 1
+    UPSTREAM_MAX_RETRIES: int = 2
+    UPSTREAM_BACKOFF_BASE: float = 0.2
+    UPSTREAM_BACKOFF_MAX: float = 5.0
+    UPSTREAM_RETRY_BUDGET_RATIO: float = 0.2
+    UPSTREAM_RETRY_BUDGET_BURST: int = 10
+    
+    # Conditional-request (ETag / Last-Modified) cache for GitHub and Jira GETs
+    HTTP_CACHE_MAX_ENTRIES: int = 1000
+    HTTP_CACHE_MAX_BYTES: int = 20_000_000
+    HTTP_CACHE_SQLITE_PATH: str = ""  # e.g. "http_cache.db"; empty keeps the cache in memory only
+    HTTP_CACHE_DISK_MAX_ENTRIES: int = 10000
+    
+    # Dashboard, sprint, narrative and anomaly storage: "memory" (lost on restart) or
+    # "sqlite" (WAL-mode file at STORAGE_SQLITE_PATH)
+    STORAGE_BACKEND: str = "memory"
+    STORAGE_SQLITE_PATH: str = "devai.db"
+    
+    # Cross-worker events: "local" (one process) or "unix" (uvicorn workers on one host share a
+    # Unix-socket broker). With "unix", use STORAGE_BACKEND=sqlite so the workers share state too.
+    EVENT_BUS_MODE: str = "local"
+    EVENT_BUS_SOCKET_PATH: str = "/tmp/devai-events.sock"
+    EVENT_BUS_RECONNECT_DELAY: float = 1.0
+    
     # CORS
     CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
@@ -24,6 +84,80 @@ class Settings(BaseSettings):
     # API Settings
     API_V1_PREFIX: str = "/api/v1"
     
+    # Outbound HTTP: one pooled client per upstream host. Claude, GitHub and Jira use their
+    # own limits (CLAUDE_HTTP_*, GITHUB_HTTP_*, JIRA_HTTP_*); other hosts (OAuth) use these
+    HTTP_DEFAULT_TIMEOUT: float = 15.0
+    HTTP_DEFAULT_MAX_CONNECTIONS: int = 10
+    HTTP_DEFAULT_MAX_KEEPALIVE: int = 5
+    HTTP_DEFAULT_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Claude HTTP client (shared keep-alive pool)
+    # Point at a mock Messages API (see benchmarks/) to load-test without real tokens
+    CLAUDE_API_URL: str = "https://api.anthropic.com/v1/messages"
+    CLAUDE_HTTP_TIMEOUT: float = 30.0
+    CLAUDE_HTTP_MAX_CONNECTIONS: int = 20
+    CLAUDE_HTTP_MAX_KEEPALIVE: int = 10
+    CLAUDE_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    CLAUDE_HTTP2: bool = True  # Only used when the optional h2 package is installed
+    
+    # Claude response cache (LRU + TTL)
+    CLAUDE_RESPONSE_CACHE_ENABLED: bool = True
+    CLAUDE_RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    CLAUDE_RESPONSE_CACHE_MAX_BYTES: int = 4_000_000
+    CLAUDE_RESPONSE_CACHE_TTL: float = 300.0
+    # Answers at temperature > 0 vary between calls; cache them only when opted in.
+    # /api/chat asks lookup-style questions at temperature 0, so those are cached either way.
+    CLAUDE_RESPONSE_CACHE_SAMPLED: bool = False
+    
+    # Claude model availability
+    CLAUDE_MODEL_COOLDOWN: float = 600.0  # Seconds to skip a model after a 404
+    CLAUDE_PROBE_MODELS_ON_STARTUP: bool = True
+    
+    # Outbound Claude rate limiting (adapted at runtime from anthropic-ratelimit-* headers)
+    CLAUDE_RATE_LIMIT_RPM: float = 50.0
+    CLAUDE_RATE_LIMIT_BURST: int = 10
+    CLAUDE_MAX_CONCURRENCY: int = 8
+    CLAUDE_QUEUE_MAX_DEPTH: int = 100
+    CLAUDE_QUEUE_MAX_WAIT: float = 20.0  # Seconds a request may wait before being shed
+    CLAUDE_RATE_LIMIT_MAX_RETRIES: int = 3  # Retries after 429/529 responses
+    
+    # Mark stable prompt prefixes (system prompt, shared context) with cache_control once the
+    # prefix reaches the API's minimum cacheable length (1024 tokens for Sonnet, 2048 for Haiku)
+    CLAUDE_PROMPT_CACHING: bool = True
+    CLAUDE_PROMPT_CACHE_MIN_TOKENS: int = 1024
+    
+    # Latency-based routing between a fast and a high-quality model tier
+    CLAUDE_ROUTING_ENABLED: bool = True
+    CLAUDE_FAST_MODEL: str = "claude-3-5-haiku-20241022"
+    CLAUDE_QUALITY_MODEL: str = "claude-3-5-sonnet-20241022"
+    CLAUDE_FAST_TIMEOUT: float = 15.0
+    CLAUDE_QUALITY_TIMEOUT: float = 30.0
+    CLAUDE_HEDGE_AFTER: float = 8.0  # Quality-tier latency budget before hedging to the fast tier
+    CLAUDE_FAST_MAX_WORDS: int = 40  # Longer prompts always go to the quality tier
+    
+    # Bulk assignment: issues packed per Claude call and concurrent calls
+    CLAUDE_BULK_CHUNK_TOKENS: int = 8000
+    CLAUDE_BULK_MAX_OUTPUT_TOKENS: int = 4096
+    CLAUDE_BULK_CONCURRENCY: int = 4
+    
+    # Chat retrieval: snippets from the local index attached to each question
+    CHAT_RETRIEVAL_TOP_K: int = 5
+    CHAT_RETRIEVAL_TOKEN_BUDGET: int = 1200
+    
+    # Chat sessions: history past CHAT_SESSION_HISTORY_TOKENS is compacted into a summary
+    CHAT_SESSION_MAX_SESSIONS: int = 1000
+    CHAT_SESSION_TTL: float = 1800.0
+    CHAT_SESSION_HISTORY_TOKENS: int = 2000
+    CHAT_SESSION_KEEP_TURNS: int = 4
+    CHAT_SESSION_SUMMARY_TOKENS: int = 300
+    
+    # How often request handlers check whether the client is still connected
+    CLIENT_DISCONNECT_POLL_INTERVAL: float = 0.5
+    
+    # Claude telemetry: rolling window used for percentile summaries
+    CLAUDE_METRICS_WINDOW_MINUTES: float = 15.0
+    CLAUDE_METRICS_MAX_SAMPLES: int = 10000
+    
     model_config = SettingsConfigDict(
         env_file=str(env_file_path),
         env_file_encoding="utf-8",
@@ -87,7 +87,9 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException)
                 "status_code": exc.status_code,
                 "path": request.url.path
             }
-        }
+        },
+        # Keep headers such as Retry-After (429) and WWW-Authenticate (401)
+        headers=getattr(exc, "headers", None),
     )
 
 
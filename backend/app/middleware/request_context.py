@@ -0,0 +1,23 @@
+"""
+Request context middleware
+Exposes the current request's ASGI scope to code that has no Request object (e.g. the
+Claude client), so telemetry can be labelled with the caller route
+"""
+from app.services.telemetry import current_scope
+
+
+class RouteContextMiddleware:
+    """Pure ASGI middleware: works with streaming responses and disconnect detection"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
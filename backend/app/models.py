@@ -27,4 +27,17 @@ class AIRecommendationRequest(BaseModel):
     issue_title: str
     issue_description: Optional[str] = None
     available_developers: Optional[list[str]] = None
+    labels: Optional[list[str]] = None
+
 
+class BulkAssignmentIssue(BaseModel):
+    id: str
+    title: str
+    description: Optional[str] = None
+    labels: Optional[list[str]] = None
+    priority: str = "medium"
+
+class BulkAssignmentRequest(BaseModel):
+    # Defaults to the unassigned, not yet done issues currently on the dashboard
+    issues: Optional[list[BulkAssignmentIssue]] = None
+    available_developers: Optional[list[str]] = None
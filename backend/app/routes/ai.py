@@ -0,0 +1,160 @@
+"""Operational endpoints for the Claude integration."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from anthropic_client import (
+    FAST_TIER,
+    QUALITY_TIER,
+    get_pool_stats,
+    inflight_requests,
+    model_registry,
+    probe_models,
+    rate_limiter,
+    response_cache,
+    routing_stats,
+)
+from app.services.chat_intents import chat_fast_path
+from app.services.circuit_breaker import circuit_breakers
+from app.services.chat_sessions import chat_sessions
+from app.services.request_cancellation import cancellation_stats
+from app.services.retrieval_index import retrieval_index
+from app.services.telemetry import ai_telemetry
+
+router = APIRouter(prefix="/api/ai", tags=["ai"])
+
+
+@router.get("/pool")
+async def get_http_pool_stats():
+    """Get connection pool statistics for the shared Claude HTTP client"""
+    return {
+        "status": "success",
+        "pool": get_pool_stats()
+    }
+
+
+@router.get("/cache")
+async def get_response_cache_stats():
+    """Get hit/miss statistics for the Claude response cache"""
+    return {
+        "status": "success",
+        "cache": response_cache.stats()
+    }
+
+
+@router.delete("/cache")
+async def clear_response_cache():
+    """Drop all cached Claude responses"""
+    response_cache.clear()
+    return {
+        "status": "success",
+        "message": "Response cache cleared"
+    }
+
+
+@router.get("/model")
+async def get_resolved_model():
+    """Get the Claude model currently in use and any models on cooldown"""
+    return {
+        "status": "success",
+        **model_registry.status()
+    }
+
+
+@router.post("/model/probe")
+async def probe_claude_models():
+    """Re-check all candidate Claude models concurrently"""
+    availability = await probe_models()
+    return {
+        "status": "success",
+        "availability": availability,
+        **model_registry.status()
+    }
+
+
+@router.get("/inflight")
+async def get_inflight_stats():
+    """Get single-flight coalescing and client-disconnect cancellation statistics for Claude requests"""
+    return {
+        "status": "success",
+        "inflight": inflight_requests.stats(),
+        "cancellations": cancellation_stats
+    }
+
+
+@router.get("/rate-limit")
+async def get_rate_limit_stats():
+    """Get queue depth, wait times and shed counts for the outbound Claude limiter"""
+    return {
+        "status": "success",
+        "rate_limit": rate_limiter.stats()
+    }
+
+
+@router.get("/routing")
+async def get_routing_stats():
+    """Get model tier configuration and how many prompts each tier handled"""
+    return {
+        "status": "success",
+        "tiers": {
+            tier.name: {"model": tier.model, "timeout_seconds": tier.timeout}
+            for tier in (FAST_TIER, QUALITY_TIER)
+        },
+        "counts": routing_stats
+    }
+
+
+@router.get("/fast-path")
+async def get_fast_path_stats():
+    """Get the share of chat questions answered locally without calling Claude"""
+    return {
+        "status": "success",
+        "fast_path": chat_fast_path.stats()
+    }
+
+
+@router.get("/retrieval")
+async def get_retrieval_stats():
+    """Get document counts for the local chat retrieval index"""
+    return {
+        "status": "success",
+        "index": retrieval_index.stats()
+    }
+
+
+@router.get("/retrieval/search")
+async def search_retrieval_index(q: str, k: int = 5):
+    """Search the local retrieval index (what chat would attach for this query)"""
+    return {
+        "status": "success",
+        "results": retrieval_index.search(q, k=k)
+    }
+
+
+@router.get("/sessions")
+async def get_chat_session_stats():
+    """Get live session count, evictions and compactions for the chat session store"""
+    return {
+        "status": "success",
+        "sessions": chat_sessions.stats()
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def scrape_ai_metrics():
+    """Claude call counters and histograms, plus upstream circuit breaker state, in Prometheus text format"""
+    body = ai_telemetry.render() + circuit_breakers.render()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/summary")
+async def get_ai_metrics_summary(minutes: Optional[float] = None):
+    """Get p50/p95/p99 latency and TTFB, error rates and tokens per model and route over the last N minutes"""
+    return {
+        "status": "success",
+        **ai_telemetry.summary(minutes)
+    }
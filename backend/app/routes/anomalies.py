@@ -1,13 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 import json
+from app.services.retrieval_index import retrieval_index, anomaly_documents
+from app.services.storage import anomaly_repository
 
 router = APIRouter(prefix="/api/anomalies", tags=["anomalies"])
 
-# In-memory storage for anomalies (replace with DB in production)
-anomalies_store: List[Dict] = []
+# Anomalies by id; persisted per STORAGE_BACKEND
+anomalies_store = anomaly_repository
 
 
 class AnomalyMetric(BaseModel):
@@ -84,9 +86,9 @@ async def detect_anomalies(request: DetectAnomaliesRequest):
         # Limit to max_anomalies
         anomalies = anomalies[:request.max_anomalies]
         
-        # Store anomalies
-        global anomalies_store
-        anomalies_store = [a.dict() for a in anomalies]
+        # Store anomalies (one transaction)
+        await anomalies_store.replace_all(a.dict() for a in anomalies)
+        retrieval_index.replace_kind("anomaly", anomaly_documents(anomalies_store.all()))
         
         return DetectAnomaliesResponse(
             status="success",
@@ -99,19 +101,53 @@ async def detect_anomalies(request: DetectAnomaliesRequest):
 
 
 @router.get("/list")
-async def list_anomalies():
-    """Get all detected anomalies"""
+async def list_anomalies(
+    type: Optional[str] = None,
+    severity: Optional[str] = None,
+    developer: Optional[str] = None,
+    ticket: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """
+    Get detected anomalies, optionally filtered, sorted and paginated
+    
+    Filters take comma-separated alternatives (e.g. severity=high,medium). `sort` is one of
+    detectedAt, severity, type or id, prefixed with "-" for descending; detection order by
+    default. Pass the returned `next_cursor` as `cursor` to fetch the next page.
+    """
+    filters = {
+        "type": _split(type),
+        "severity": _split(severity),
+        "developer": _split(developer),
+        "ticket": _split(ticket),
+    }
+    sort = sort or ""
+    try:
+        anomalies, total, next_cursor = anomalies_store.query(
+            filters, sort=sort.lstrip("-"), descending=sort.startswith("-"), limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     return {
         "status": "success",
-        "anomalies": anomalies_store,
-        "count": len(anomalies_store)
+        "anomalies": anomalies,
+        "count": len(anomalies),
+        "total": total,
+        "next_cursor": next_cursor
     }
 
 
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()] if value else []
+
+
 @router.get("/{anomaly_id}")
 async def get_anomaly(anomaly_id: str):
     """Get a specific anomaly"""
-    anomaly = next((a for a in anomalies_store if a.get("id") == anomaly_id), None)
+    anomaly = anomalies_store.get(anomaly_id)
     
     if not anomaly:
         raise HTTPException(status_code=404, detail=f"Anomaly {anomaly_id} not found")
@@ -2,29 +2,79 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import sys
 from pathlib import Path
-from fastapi import APIRouter, HTTPException
+from typing import AsyncIterator, Optional
+import httpx
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 # Add backend root to Python path to import modules at root level
 backend_root = Path(__file__).parent.parent.parent
 if str(backend_root) not in sys.path:
     sys.path.insert(0, str(backend_root))
 
-from anthropic_client import ClaudeClientError, generate_claude_response
+from anthropic_client import (
+    SYSTEM_MESSAGE,
+    ClaudeClientError,
+    ClaudeRateLimitError,
+    FAST_TIER,
+    classify_prompt,
+    generate_routed_message,
+    stream_claude_response,
+)
+from app.config import settings
+from app.services.chat_intents import chat_fast_path
+from app.services.chat_sessions import ChatSession, chat_sessions
+from app.services.prompt_builder import BuiltPrompt, PromptBuilder
+from app.services.request_cancellation import (
+    CLIENT_CLOSED_REQUEST,
+    ClientDisconnected,
+    cancel_on_disconnect,
+)
+from app.services.retrieval_index import retrieval_index
 from schemas import ChatRequest, ChatResponse
 
 logger = logging.getLogger("chatbot")
 
+# Short factual lookups are answered deterministically so a repeated question is served
+# from the response cache (sampled answers are only cached with CLAUDE_RESPONSE_CACHE_SAMPLED)
+LOOKUP_TEMPERATURE = 0.0
+CHAT_TEMPERATURE = 0.2
+
+# Server-sent events must reach the client as they are written, not after proxy buffering
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 router = APIRouter()
 
 
 @router.post("/chat", response_model=ChatResponse, tags=["Chat"])
-async def chat_endpoint(request: ChatRequest) -> ChatResponse:
-    """Receive a user question, forward to Claude, and return the answer."""
+async def chat_endpoint(request: ChatRequest, http_request: Request) -> ChatResponse:
+    """Receive a user question, forward to Claude, and return the answer.
+
+    The upstream Claude call is cancelled if the client disconnects first.
+    """
+    session = chat_sessions.get_or_create(request.session_id)
+    local_answer = chat_fast_path.answer(request.question)
+    if local_answer is not None:
+        chat_sessions.record(session, request.question, local_answer)
+        return ChatResponse(answer=local_answer, tier="local", session_id=session.id)
+
     try:
-        answer = await generate_claude_response(request.question)
+        result = await cancel_on_disconnect(
+            generate_routed_message(
+                _build_chat_prompt(request.question, session),
+                temperature=_temperature_for(request.question),
+            ),
+            http_request.is_disconnected,
+            poll_interval=settings.CLIENT_DISCONNECT_POLL_INTERVAL,
+        )
+    except ClientDisconnected as exc:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request") from exc
+    except ClaudeRateLimitError as exc:
+        raise _rate_limited(exc) from exc
     except ClaudeClientError as exc:
         logger.exception("Claude client error: %s", exc)
         raise HTTPException(status_code=502, detail=str(exc)) from exc
@@ -32,5 +82,156 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
         logger.exception("Unexpected error while contacting Claude.")
         raise HTTPException(status_code=500, detail="Unexpected error") from exc
 
-    return ChatResponse(answer=answer)
+    chat_sessions.record(session, request.question, result.text, result.usage)
+    return ChatResponse(
+        answer=result.text,
+        model=result.model,
+        tier=result.tier,
+        usage=result.usage,
+        cached=result.cached,
+        session_id=session.id,
+    )
+
+
+@router.get("/chat/sessions/{session_id}", tags=["Chat"])
+async def get_chat_session(session_id: str):
+    """Get turn counts, summary and token usage for a chat session."""
+    session = chat_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found or expired")
+    return {"status": "success", "session": session.to_dict()}
+
+
+@router.delete("/chat/sessions/{session_id}", tags=["Chat"])
+async def delete_chat_session(session_id: str):
+    """End a chat session and drop its history."""
+    if not chat_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Chat session not found or expired")
+    return {"status": "success", "message": f"Chat session {session_id} deleted"}
+
+
+def _build_chat_prompt(question: str, session: Optional[ChatSession] = None) -> BuiltPrompt:
+    """Attach computed facts, retrieved snippets and the session's history to the question.
+
+    The session summary and earlier turns form the cached prefix once it is long
+    enough to cache (CLAUDE_PROMPT_CACHE_MIN_TOKENS); per-question facts and snippets
+    ride along in the (uncached) question block so they don't invalidate it.
+    """
+    builder = PromptBuilder(
+        system=SYSTEM_MESSAGE,
+        cache=settings.CLAUDE_PROMPT_CACHING,
+        min_cache_tokens=settings.CLAUDE_PROMPT_CACHE_MIN_TOKENS,
+    )
+    history = list(session.turns) if session else []
+    if session and session.summary:
+        builder.add_context("Summary of the earlier conversation:\n" + session.summary)
+    for turn in history:
+        builder.add_turn(turn["role"], turn["content"])
+
+    # Follow-ups ("and who owns it?") retrieve better with the previous question attached
+    previous = session.last_question() if session else None
+    query = f"{previous} {question}" if previous else question
+
+    facts = chat_fast_path.facts_for(query)
+    if facts:
+        builder.attach("Current project data:\n" + "\n".join(f"- {fact}" for fact in facts))
+    snippets = retrieval_index.context_for(
+        query,
+        k=settings.CHAT_RETRIEVAL_TOP_K,
+        token_budget=settings.CHAT_RETRIEVAL_TOKEN_BUDGET,
+    )
+    if snippets:
+        builder.attach("Relevant project records:\n" + "\n".join(f"- {s}" for s in snippets))
+    return builder.set_question(question).build()
+
+
+def _temperature_for(question: str) -> float:
+    return LOOKUP_TEMPERATURE if classify_prompt(question) is FAST_TIER else CHAT_TEMPERATURE
+
+
+def _rate_limited(exc: ClaudeRateLimitError) -> HTTPException:
+    """Map a shed request to 429 so clients back off instead of seeing a 502."""
+    logger.warning("Claude request shed by rate limiter: %s", exc)
+    headers = {"Retry-After": str(int(exc.retry_after + 0.999))} if exc.retry_after else None
+    return HTTPException(status_code=429, detail=str(exc), headers=headers)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat/stream", tags=["Chat"])
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request) -> StreamingResponse:
+    """Stream Claude's answer as server-sent events.
+
+    Emits ``delta`` events with ``{"text": ...}`` as tokens arrive, then a
+    ``done`` event carrying token usage. Errors before the first token map to HTTP status codes
+    like ``/chat``; later errors are sent as an ``error`` event. The answer is
+    recorded in the chat session once the stream completes.
+    """
+    session = chat_sessions.get_or_create(request.session_id)
+    local_answer = chat_fast_path.answer(request.question)
+    if local_answer is not None:
+        chat_sessions.record(session, request.question, local_answer)
+
+        async def local_stream() -> AsyncIterator[str]:
+            yield _sse("delta", {"text": local_answer})
+            yield _sse("done", {"usage": {}, "tier": "local", "session_id": session.id})
+
+        return StreamingResponse(local_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    usage: dict = {}
+    # Streams are routed by tier too, but not hedged: the first token arrives quickly either way
+    tier = classify_prompt(request.question) if settings.CLAUDE_ROUTING_ENABLED else None
+    deltas = stream_claude_response(
+        _build_chat_prompt(request.question, session), model=tier.model if tier else None, usage=usage
+    )
+
+    # Wait for the first delta so upstream errors still surface as HTTP errors
+    try:
+        first = await cancel_on_disconnect(
+            deltas.__anext__(),
+            http_request.is_disconnected,
+            poll_interval=settings.CLIENT_DISCONNECT_POLL_INTERVAL,
+        )
+    except StopAsyncIteration:
+        first = None
+    except ClientDisconnected as exc:
+        await deltas.aclose()
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request") from exc
+    except ClaudeRateLimitError as exc:
+        raise _rate_limited(exc) from exc
+    except (ClaudeClientError, httpx.HTTPError) as exc:
+        logger.exception("Claude client error: %s", exc)
+        raise HTTPException(status_code=502, detail=str(exc) or type(exc).__name__) from exc
+    except Exception as exc:  # pragma: no cover - defensive
+        logger.exception("Unexpected error while contacting Claude.")
+        raise HTTPException(status_code=500, detail="Unexpected error") from exc
+
+    async def event_stream() -> AsyncIterator[str]:
+        parts = [first] if first is not None else []
+        try:
+            if first is not None:
+                yield _sse("delta", {"text": first})
+            async for text in deltas:
+                if await http_request.is_disconnected():
+                    logger.info("Chat stream client disconnected; cancelling upstream request.")
+                    break
+                parts.append(text)
+                yield _sse("delta", {"text": text})
+            else:
+                chat_sessions.record(session, request.question, "".join(parts), usage)
+                yield _sse("done", {"usage": usage, "session_id": session.id})
+        except (ClaudeClientError, httpx.HTTPError) as exc:
+            # Transport failures (dropped connection, read timeout) end the stream the same way
+            logger.exception("Claude client error mid-stream: %s", exc)
+            yield _sse("error", {"detail": str(exc) or type(exc).__name__})
+        finally:
+            # Closing the generator closes the upstream HTTP stream
+            await deltas.aclose()
 
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
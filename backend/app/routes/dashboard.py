@@ -3,21 +3,22 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 import json
+from app.services.event_bus import event_bus
+from app.services.retrieval_index import retrieval_index, issue_documents
+from app.services.storage import dashboard_state, sprint_repository
 
 router = APIRouter()
 
-# Store for dashboard data (in production, use Redis or a database)
-dashboard_data = {
-    "issues": [],
-    "last_updated": None,
-    "repository": None,
-    "sprints": [],
-    "srs_document": None
-}
+# Dashboard state (issues, repository, SRS document); persisted per STORAGE_BACKEND
+dashboard_data = dashboard_state
+
+# Topic every worker relays to its own WebSocket clients
+BROADCAST_TOPIC = "dashboard.broadcast"
 
 # WebSocket connection manager for real-time updates
 class ConnectionManager:
     def __init__(self):
+        # Only this worker's sockets; other workers get broadcasts through the event bus
         self.active_connections: List[WebSocket] = []
 
     async def connect(self, websocket: WebSocket):
@@ -28,13 +29,18 @@ class ConnectionManager:
         self.active_connections.remove(websocket)
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+        """Send to every dashboard client, whichever worker it is connected to"""
+        await event_bus.publish(BROADCAST_TOPIC, message)
+
+    async def send_local(self, message: dict):
+        for connection in list(self.active_connections):
             try:
                 await connection.send_json(message)
             except:
                 pass
 
 manager = ConnectionManager()
+event_bus.subscribe(BROADCAST_TOPIC, manager.send_local)
 
 
 class DashboardIssue(BaseModel):
@@ -60,15 +66,20 @@ async def sync_issues(request: DashboardSyncRequest):
     Receive issues from MCP server and store them for dashboard
     """
     try:
-        # Store the data
-        dashboard_data["issues"] = [issue.dict() for issue in request.issues]
-        dashboard_data["last_updated"] = datetime.utcnow().isoformat()
-        dashboard_data["repository"] = request.repository
+        # Store the data (one write)
+        await dashboard_data.save({
+            "issues": [issue.dict() for issue in request.issues],
+            "last_updated": datetime.utcnow().isoformat(),
+            "repository": request.repository,
+        })
+        
+        # Keep chat retrieval in step (only changed issues are re-indexed)
+        retrieval_index.replace_kind("issue", issue_documents(dashboard_data["issues"]))
         
         # Broadcast to all connected WebSocket clients
         await manager.broadcast({
             "type": "issues_update",
-            "data": dashboard_data
+            "data": {**dashboard_data, "sprints": sprint_repository.all()}
         })
         
         return {
@@ -113,7 +124,7 @@ async def websocket_endpoint(websocket: WebSocket):
             "type": "initial_data",
             "data": {
                 "issues": dashboard_data.get("issues", []),
-                "sprints": dashboard_data.get("sprints", []),
+                "sprints": sprint_repository.all(),
                 "srs_document": dashboard_data.get("srs_document"),
                 "repository": dashboard_data.get("repository"),
                 "last_updated": dashboard_data.get("last_updated")
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, HTTPException
-from app.models import Issue, IssueAssignment
+from fastapi import APIRouter, HTTPException, Request
+from app.config import settings
+from app.models import Issue, IssueAssignment, AIRecommendationRequest, BulkAssignmentRequest
+from app.routes.dashboard import manager, dashboard_data
+from app.services.ai_service import AIService
+from app.services.assignment_engine import DONE_STATUSES
 from app.services.github_service import GitHubService
+from app.services.issue_aggregator import issue_aggregator
 from app.services.jira_service import JiraService
+from app.services.request_cancellation import CLIENT_CLOSED_REQUEST, ClientDisconnected, cancel_on_disconnect
 from typing import List
+import uuid
 
 router = APIRouter()
 
 github_service = GitHubService()
 jira_service = JiraService()
+ai_service = AIService()
 
 @router.get("/issues", response_model=List[Issue])
 async def get_issues():
@@ -15,35 +23,10 @@ async def get_issues():
     Fetch all issues from GitHub and Jira
     """
     try:
-        # For now, return mock data
-        # TODO: Integrate with actual GitHub and Jira APIs
-        issues = [
-            {
-                "id": "1",
-                "title": "Implement user authentication",
-                "status": "open",
-                "assignee": None,
-                "priority": "high",
-                "createdAt": "2025-01-08T10:00:00Z",
-            },
-            {
-                "id": "2",
-                "title": "Fix dashboard loading issue",
-                "status": "in-progress",
-                "assignee": "developer1",
-                "priority": "medium",
-                "createdAt": "2025-01-07T14:30:00Z",
-            },
-            {
-                "id": "3",
-                "title": "Add unit tests for API endpoints",
-                "status": "open",
-                "assignee": None,
-                "priority": "low",
-                "createdAt": "2025-01-06T09:15:00Z",
-            },
-        ]
-        return issues
+        if not issue_aggregator.configured():
+            # No sources configured: serve whatever the MCP server last synced
+            return dashboard_data["issues"]
+        return await issue_aggregator.get_issues()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -71,3 +54,78 @@ async def assign_issue(issue_id: str, assignment: IssueAssignment):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/issues/{issue_id}/recommend")
+async def recommend_assignee(issue_id: str, request: AIRecommendationRequest, http_request: Request):
+    """
+    Recommend a developer for an issue (local pre-ranking + Claude)
+    """
+    try:
+        developers = [{"name": name} for name in request.available_developers or []]
+        recommendation = await cancel_on_disconnect(
+            ai_service.get_assignment_recommendation(
+                request.issue_title,
+                request.issue_description,
+                developers=developers or None,
+                labels=request.labels,
+            ),
+            http_request.is_disconnected,
+            poll_interval=settings.CLIENT_DISCONNECT_POLL_INTERVAL,
+        )
+        return {"issue_id": issue_id, **recommendation}
+    except ClientDisconnected:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/issues/bulk-recommend")
+async def bulk_recommend_assignees(request: BulkAssignmentRequest, http_request: Request):
+    """
+    Recommend assignees for a whole batch of unassigned issues
+
+    Issues are packed into as few Claude calls as fit the context budget and
+    processed concurrently; per-chunk progress is broadcast on the dashboard
+    WebSocket as "bulk_assignment_progress" messages. Outstanding chunks are
+    cancelled if the client disconnects.
+    """
+    try:
+        if request.issues is not None:
+            issues = [issue.dict() for issue in request.issues]
+        else:
+            issues = [
+                i for i in dashboard_data["issues"]
+                if not i.get("assignee") and str(i.get("status", "")).lower() not in DONE_STATUSES
+            ]
+        if not issues:
+            raise HTTPException(status_code=400, detail="No unassigned issues to assign")
+
+        job_id = str(uuid.uuid4())
+
+        async def report_progress(progress: dict):
+            await manager.broadcast({
+                "type": "bulk_assignment_progress",
+                "data": {"job_id": job_id, **progress}
+            })
+
+        developers = [{"name": name} for name in request.available_developers or []]
+        result = await cancel_on_disconnect(
+            ai_service.recommend_assignments_bulk(
+                issues,
+                developers=developers or None,
+                on_progress=report_progress,
+            ),
+            http_request.is_disconnected,
+            poll_interval=settings.CLIENT_DISCONNECT_POLL_INTERVAL,
+        )
+        await manager.broadcast({
+            "type": "bulk_assignment_complete",
+            "data": {"job_id": job_id, "count": len(result["assignments"])}
+        })
+        return {"status": "success", "job_id": job_id, "count": len(issues), **result}
+    except ClientDisconnected:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,11 +3,13 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from pydantic import BaseModel
 import json
+from app.services.retrieval_index import retrieval_index, narrative_documents
+from app.services.storage import narrative_repository
 
 router = APIRouter(prefix="/api/narratives", tags=["narratives"])
 
-# In-memory storage for narratives (replace with DB in production)
-narratives_store: List[Dict] = []
+# Narratives by ticketId; persisted per STORAGE_BACKEND
+narratives_store = narrative_repository
 
 
 class CommitEvent(BaseModel):
@@ -153,9 +155,9 @@ async def generate_narratives(request: GenerateNarrativesRequest):
             
             narratives.append(narrative_obj)
         
-        # Store narratives
-        global narratives_store
-        narratives_store = [n.dict() for n in narratives]
+        # Store narratives (one transaction)
+        await narratives_store.replace_all(n.dict() for n in narratives)
+        retrieval_index.replace_kind("narrative", narrative_documents(narratives_store.all()))
         
         return GenerateNarrativesResponse(
             status="success",
@@ -172,7 +174,7 @@ async def list_narratives():
     """Get all stored narratives"""
     return {
         "status": "success",
-        "narratives": narratives_store,
+        "narratives": narratives_store.all(),
         "count": len(narratives_store)
     }
 
@@ -180,7 +182,7 @@ async def list_narratives():
 @router.get("/{ticket_id}")
 async def get_narrative(ticket_id: str):
     """Get narrative for a specific ticket"""
-    narrative = next((n for n in narratives_store if n.get("ticketId") == ticket_id), None)
+    narrative = narratives_store.get(ticket_id)
     
     if not narrative:
         raise HTTPException(status_code=404, detail=f"Narrative for {ticket_id} not found")
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
+from app.services.retrieval_index import retrieval_index, sprint_documents
+from app.services.storage import sprint_repository, srs_state
 
 # Import dashboard manager and data (avoid circular import by importing here)
 try:
@@ -12,12 +14,8 @@ except ImportError:
 
 router = APIRouter()
 
-# In-memory storage for sprints (in production, use a database)
-sprints_storage = {
-    "srs_document": None,
-    "sprints": [],
-    "last_updated": None
-}
+# SRS document metadata and last sync time; the sprints themselves live in sprint_repository
+sprints_storage = srs_state
 
 
 class SprintSyncRequest(BaseModel):
@@ -77,15 +75,18 @@ async def sync_sprints_to_dashboard(request: SprintSyncRequest):
         
         from datetime import datetime
         
-        # Store sprints
-        sprints_storage["sprints"] = request.sprints
-        sprints_storage["last_updated"] = datetime.utcnow().isoformat()
+        # Store sprints (one transaction)
+        await sprint_repository.replace_all(request.sprints)
+        
+        # Keep chat retrieval in step (only changed stories are re-indexed)
+        retrieval_index.replace_kind("sprint", sprint_documents(request.sprints))
         
         # Store SRS document metadata if provided
+        updates = {"last_updated": datetime.utcnow().isoformat()}
         if request.srs_document:
-            sprints_storage["srs_document"] = request.srs_document
+            updates["srs_document"] = request.srs_document
         elif request.document_name:
-            sprints_storage["srs_document"] = {
+            updates["srs_document"] = {
                 "id": "srs-001",
                 "name": request.document_name,
                 "url": request.document_url,
@@ -93,13 +94,14 @@ async def sync_sprints_to_dashboard(request: SprintSyncRequest):
                 "totalRequirements": sum(len(sprint.get("userStories", [])) for sprint in request.sprints),
                 "status": "ready"
             }
+        await sprints_storage.save(updates)
         
         # Update dashboard_data for WebSocket broadcasting
         if dashboard_data is not None:
-            dashboard_data["sprints"] = request.sprints
+            dashboard_updates = {"last_updated": sprints_storage["last_updated"]}
             if sprints_storage.get("srs_document"):
-                dashboard_data["srs_document"] = sprints_storage["srs_document"]
-            dashboard_data["last_updated"] = sprints_storage["last_updated"]
+                dashboard_updates["srs_document"] = sprints_storage["srs_document"]
+            await dashboard_data.save(dashboard_updates)
             
             # Broadcast to all connected WebSocket clients
             if manager is not None:
@@ -149,8 +151,8 @@ async def get_sprints():
     """
     return {
         "status": "success",
-        "sprints": sprints_storage["sprints"],
-        "count": len(sprints_storage["sprints"]),
+        "sprints": sprint_repository.all(),
+        "count": len(sprint_repository),
         "last_updated": sprints_storage["last_updated"]
     }
 
@@ -160,8 +162,7 @@ async def get_sprint(sprint_id: str):
     """
     Get a specific sprint by ID
     """
-    sprints = sprints_storage["sprints"]
-    sprint = next((s for s in sprints if s.get("id") == sprint_id), None)
+    sprint = sprint_repository.get(sprint_id)
     
     if not sprint:
         raise HTTPException(status_code=404, detail="Sprint not found")
@@ -184,14 +185,13 @@ async def update_user_story_status(
     """
     Update user story status
     """
-    sprints = sprints_storage["sprints"]
-    sprint = next((s for s in sprints if s.get("id") == sprint_id), None)
+    sprint = sprint_repository.get(sprint_id)
     
     if not sprint:
         raise HTTPException(status_code=404, detail="Sprint not found")
     
     user_stories = sprint.get("userStories", [])
-    story = next((s for s in user_stories if s.get("id") == story_id), None)
+    story = sprint_repository.get_story(sprint_id, story_id)
     
     if not story:
         raise HTTPException(status_code=404, detail="User story not found")
@@ -203,6 +203,10 @@ async def update_user_story_status(
     sprint["completedStoryPoints"] = sum(s.get("storyPoints", 0) for s in completed_stories)
     total_points = sprint.get("totalStoryPoints", 1)
     sprint["progress"] = int((sprint["completedStoryPoints"] / total_points) * 100) if total_points > 0 else 0
+    await sprint_repository.put(sprint)
+    
+    # Re-index the story and its sprint (unchanged documents are skipped)
+    retrieval_index.replace_kind("sprint", sprint_documents(sprint_repository.all()))
     
     return {
         "status": "success",
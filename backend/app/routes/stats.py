@@ -1,6 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from app.models import ProjectStats
+from app.routes.dashboard import dashboard_data
 from app.services.github_service import GitHubService
+from app.services.circuit_breaker import circuit_breakers
+from app.services.event_bus import event_bus
+from app.services.http_cache import http_cache
+from app.services.http_clients import http_clients
+from app.services.issue_aggregator import issue_aggregator
 from app.services.jira_service import JiraService
 
 router = APIRouter()
@@ -14,15 +20,94 @@ async def get_project_stats():
     Get project statistics (total issues, open, closed, in progress)
     """
     try:
-        # For now, return mock data
-        # TODO: Calculate actual stats from GitHub and Jira
-        stats = {
-            "totalIssues": 25,
-            "openIssues": 12,
-            "closedIssues": 10,
-            "inProgress": 3,
-        }
-        return stats
+        if not issue_aggregator.configured():
+            statuses = [issue.get("status") for issue in dashboard_data["issues"]]
+            return {
+                "totalIssues": len(statuses),
+                "openIssues": statuses.count("open"),
+                "closedIssues": statuses.count("closed"),
+                "inProgress": statuses.count("in-progress"),
+            }
+        # Counted from the cached merged issue list, not fetched again
+        return await issue_aggregator.get_stats()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/stats/issue-cache")
+async def get_issue_cache_stats():
+    """
+    Get age, sources and fresh / stale / waited read counts for the merged issue cache
+    """
+    return {
+        "status": "success",
+        "cache": issue_aggregator.stats()
+    }
+
+
+@router.delete("/stats/issue-cache")
+async def invalidate_issue_cache():
+    """
+    Make the next issues or stats read wait for a refresh from GitHub and Jira
+    """
+    issue_aggregator.invalidate()
+    return {
+        "status": "success",
+        "message": "Issue cache invalidated"
+    }
+
+
+@router.get("/stats/http-cache")
+async def get_http_cache_stats():
+    """
+    Get hit / 304 / miss counts for the GitHub and Jira conditional-request cache
+    """
+    return {
+        "status": "success",
+        "cache": http_cache.stats()
+    }
+
+
+@router.delete("/stats/http-cache")
+async def clear_http_cache():
+    """
+    Drop all cached GitHub and Jira responses
+    """
+    http_cache.clear()
+    return {
+        "status": "success",
+        "message": "HTTP cache cleared"
+    }
+
+
+@router.get("/stats/http-pools")
+async def get_http_pool_stats():
+    """
+    Get connection pool usage and limits for each upstream host (Claude, GitHub, Jira, OAuth)
+    """
+    return {
+        "status": "success",
+        "pools": http_clients.stats()
+    }
+
+
+@router.get("/stats/circuits")
+async def get_circuit_breaker_stats():
+    """
+    Get circuit state, failure and retry counts and recent state changes for each upstream host
+    """
+    return {
+        "status": "success",
+        "circuits": circuit_breakers.stats()
+    }
+
+
+@router.get("/stats/event-bus")
+async def get_event_bus_stats():
+    """
+    Get this worker's event bus role (broker or client), peers and message counts
+    """
+    return {
+        "status": "success",
+        "event_bus": event_bus.stats()
+    }
@@ -1,113 +1,382 @@
-import httpx
+import asyncio
+import json
 import logging
+import math
+import re
 from app.config import settings
-from typing import Optional, List
+from app.services.assignment_engine import (
+    build_developer_profiles,
+    plan_balanced_assignments,
+    rank_developers,
+)
+from app.services.telemetry import ai_telemetry
+from app.services.tokens import CHARS_PER_TOKEN
+from anthropic_client import generate_claude_response
+from typing import Awaitable, Callable, Optional, List
 
 logger = logging.getLogger(__name__)
 
+# Claude must answer with exactly this shape
+ASSIGNMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "assignee": {"type": "string", "description": "Name of one of the candidate developers"},
+        "reasoning": {"type": "string", "description": "One or two sentences explaining the choice"},
+    },
+    "required": ["assignee", "reasoning"],
+    "additionalProperties": False,
+}
+
+# Bulk answers are a JSON array of these
+BULK_ASSIGNMENT_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "issue_id": {"type": "string"},
+            "assignee": {"type": "string", "description": "One of that issue's candidates"},
+            "reasoning": {"type": "string", "description": "One short sentence"},
+        },
+        "required": ["issue_id", "assignee", "reasoning"],
+    },
+}
+
+# Used instead of the chat system prompt (bullet points, **bold**): these answers are parsed as JSON
+JSON_SYSTEM_MESSAGE = (
+    "You assign software issues to developers for an engineering team. "
+    "Reply with valid JSON only, exactly matching the schema given in the request: "
+    "no Markdown, code fences or text outside the JSON."
+)
+
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+# Output tokens budgeted per assignment in a bulk answer
+OUTPUT_TOKENS_PER_ISSUE = 60
+
+
 class AIService:
     def __init__(self):
         self.api_key = settings.CLAUDE_API_KEY or settings.ANTHROPIC_API_KEY
-        self.api_url = "https://api.anthropic.com/v1/messages"
-        self.headers = {
-            "anthropic-api-key": self.api_key,
-            "anthropic-version": "2023-06-01",
-            "content-type": "application/json",
-        } if self.api_key else {}
-        
+        self.model = settings.CLAUDE_QUALITY_MODEL
+        self.top_k = 3
+
         # Log API key status (first 10 chars only for security)
         if self.api_key:
             logger.info(f"Claude API key configured: {self.api_key[:10]}...")
         else:
             logger.warning("Claude API key not configured")
 
+    @ai_telemetry.timed("assignment_recommendation")
     async def get_assignment_recommendation(
         self,
         issue_title: str,
         issue_description: Optional[str] = None,
         developers: Optional[List[dict]] = None,
+        labels: Optional[List[str]] = None,
+        issues: Optional[List[dict]] = None,
     ) -> dict:
         """
-        Use Claude API to recommend the best developer for an issue
+        Recommend the best developer for an issue
+
+        Developers are ranked locally on skill overlap and open workload (from the
+        issues in dashboard_data unless `issues` is given). Only the top candidates
+        are sent to Claude, which must answer with ASSIGNMENT_SCHEMA JSON. The local
+        ranking is returned as-is when Claude is unavailable or answers badly.
         """
-        if not self.api_key:
+        candidates = self.rank_candidates(issue_title, issue_description, developers, labels, issues)
+        if not candidates:
             return {
-                "assignee": "developer1",
-                "reasoning": "AI service not configured. Default assignment.",
+                "assignee": None,
+                "reasoning": "No developers available to assign.",
+                "source": "local",
+                "candidates": [],
             }
-        
-        # Build prompt for Claude
-        prompt = f"""Analyze the following issue and recommend the best developer to assign it to.
+
+        local = self._local_recommendation(candidates)
+        if not self.api_key:
+            local["reasoning"] = f"AI service not configured. {local['reasoning']}"
+            return local
+        if len(candidates) == 1:
+            return local
+
+        prompt = f"""Choose the best developer for this issue from the shortlisted candidates.
 
 Issue Title: {issue_title}
 Issue Description: {issue_description or "No description provided"}
+Labels: {", ".join(labels or []) or "none"}
+
+Candidates (pre-ranked by skill match and current workload, best first):
+{self._format_candidates(candidates)}
+
+Weigh expertise on similar issues against current workload.
+Respond with only a JSON object matching this schema, and no other text:
+{json.dumps(ASSIGNMENT_SCHEMA)}
+"""
+
+        try:
+            # Routed through the shared client so identical in-flight prompts
+            # (e.g. MCP retries) are coalesced into one upstream request
+            text = await generate_claude_response(
+                prompt,
+                model=self.model,
+                max_tokens=256,
+                temperature=0.0,
+                system=JSON_SYSTEM_MESSAGE,
+            )
+        except Exception as e:
+            logger.warning(f"Error calling Claude API, using local ranking: {e}")
+            local["reasoning"] = f"AI service error ({e}). {local['reasoning']}"
+            return local
+
+        parsed = self._parse_assignment(text, candidates)
+        if parsed is None:
+            logger.warning(f"Unparseable assignment from Claude, using local ranking: {text[:200]}")
+            return local
+
+        return {**parsed, "source": "claude", "candidates": candidates}
+
+    @ai_telemetry.timed(
+        "bulk_assignment",
+        source_of=lambda result: "claude" if result["claude_calls"] > result["failed_chunks"] else "local",
+    )
+    async def recommend_assignments_bulk(
+        self,
+        issues: List[dict],
+        developers: Optional[List[dict]] = None,
+        existing_issues: Optional[List[dict]] = None,
+        on_progress: Optional[Callable[[dict], Awaitable[None]]] = None,
+    ) -> dict:
+        """
+        Recommend assignees for many issues with as few Claude calls as possible
+
+        A balanced local plan is computed first (greedy, highest priority first).
+        Issues are then packed into chunks that fit CLAUDE_BULK_CHUNK_TOKENS and sent
+        to Claude concurrently (at most CLAUDE_BULK_CONCURRENCY at once) to refine the
+        plan. Claude's picks are accepted only if they are one of the issue's shortlisted
+        candidates and keep the developer under the per-batch cap; otherwise the local
+        pick stands.
+
+        Args:
+            issues: Issues to assign ({"id", "title", "description", "labels", "priority"})
+            developers: Optional pool of developers to choose from
+            existing_issues: Known issues used for skills/workload (defaults to dashboard_data)
+            on_progress: Awaited with a progress dict after each chunk finishes
+        """
+        if existing_issues is None:
+            from app.routes.dashboard import dashboard_data
+            existing_issues = dashboard_data.get("issues", [])
+
+        profiles = build_developer_profiles(existing_issues, developers)
+        if developers:
+            available = {dev.get("name") for dev in developers}
+            profiles = {name: p for name, p in profiles.items() if name in available}
+
+        plan = plan_balanced_assignments(issues, profiles, top_k=self.top_k)
+        # No developer may take more than an even share of the batch (plus one for slack)
+        cap = math.ceil(len(issues) / len(profiles)) + 1 if profiles else 0
+        chunks = self._pack_chunks(issues) if self.api_key and profiles else []
+
+        progress = {"chunks": len(chunks), "completed": 0, "failed": 0, "issues": len(issues)}
+        semaphore = asyncio.Semaphore(settings.CLAUDE_BULK_CONCURRENCY)
+        plan_by_id = {entry["issue_id"]: entry for entry in plan}
+
+        async def run_chunk(index: int, chunk: List[dict]) -> dict:
+            async with semaphore:
+                try:
+                    picks = await self._assign_chunk(chunk, plan_by_id, profiles, cap)
+                    status = "completed"
+                except Exception as e:
+                    logger.warning(f"Bulk assignment chunk {index + 1}/{len(chunks)} failed: {e}")
+                    picks, status = {}, "failed"
+            progress["completed" if status == "completed" else "failed"] += 1
+            if on_progress is not None:
+                await on_progress({**progress, "chunk": index + 1, "chunk_size": len(chunk), "status": status})
+            return picks
+
+        chunk_picks = await asyncio.gather(*(run_chunk(i, c) for i, c in enumerate(chunks)))
+        claude_picks = {issue_id: pick for picks in chunk_picks for issue_id, pick in picks.items()}
+
+        # Merge in plan order so the cap is enforced deterministically
+        counts = {name: 0 for name in profiles}
+        assignments = []
+        for entry in plan:
+            pick = claude_picks.get(entry["issue_id"])
+            if pick and counts.get(pick["assignee"], cap) < cap:
+                assignee, reasoning, source = pick["assignee"], pick["reasoning"], "claude"
+            else:
+                assignee = self._least_loaded(entry["candidates"], counts, cap) or entry["assignee"]
+                reasoning, source = "Local ranking by skill match and balanced workload.", "local"
+            if assignee:
+                counts[assignee] = counts.get(assignee, 0) + 1
+            assignments.append({
+                "issue_id": entry["issue_id"],
+                "assignee": assignee,
+                "reasoning": reasoning,
+                "source": source,
+                "candidates": [c["name"] for c in entry["candidates"]],
+            })
+
+        return {
+            "assignments": assignments,
+            "per_developer": {name: n for name, n in counts.items() if n},
+            "max_per_developer": cap,
+            "claude_calls": len(chunks),
+            "failed_chunks": progress["failed"],
+        }
+
+    def _pack_chunks(self, issues: List[dict]) -> List[List[dict]]:
+        """Pack issues into as few chunks as the prompt/output token budget allows"""
+        max_tokens = settings.CLAUDE_BULK_CHUNK_TOKENS
+        max_issues = max(1, settings.CLAUDE_BULK_MAX_OUTPUT_TOKENS // OUTPUT_TOKENS_PER_ISSUE)
+
+        chunks: List[List[dict]] = []
+        current: List[dict] = []
+        used = 0
+        for issue in issues:
+            # Title + description + labels + three candidate names, with some overhead
+            size = len(self._format_bulk_issue(issue, [])) // CHARS_PER_TOKEN + 20
+            if current and (used + size > max_tokens or len(current) >= max_issues):
+                chunks.append(current)
+                current, used = [], 0
+            current.append(issue)
+            used += size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _assign_chunk(
+        self,
+        chunk: List[dict],
+        plan_by_id: dict,
+        profiles: dict,
+        cap: int,
+    ) -> dict:
+        """Ask Claude to assign one chunk; returns valid picks keyed by issue id"""
+        workload = "\n".join(
+            f"- {p['name']}: {p['open_issues']} open issue(s), workload score {round(p['workload'], 2)}"
+            for p in profiles.values()
+        )
+        lines = [
+            self._format_bulk_issue(issue, plan_by_id[str(issue.get("id"))]["candidates"])
+            for issue in chunk
+        ]
+        prompt = f"""Assign each issue below to one developer from that issue's candidate list.
+Keep the batch balanced: spread work across developers and never give one developer more than {cap} issues.
 
-Available Developers:
-{self._format_developers(developers) if developers else "No developer data available"}
+Developers (current load):
+{workload}
 
-Please recommend the best developer based on:
-1. Their expertise and past work on similar issues
-2. Their current workload
-3. The complexity and requirements of the issue
+Issues:
+{chr(10).join(lines)}
 
-Respond in JSON format with:
-- "assignee": the recommended developer's name/ID
-- "reasoning": a brief explanation of why this developer is recommended
+Respond with only a JSON array matching this schema, one item per issue, and no other text:
+{json.dumps(BULK_ASSIGNMENT_SCHEMA)}
 """
+        text = await generate_claude_response(
+            prompt,
+            model=self.model,
+            max_tokens=min(settings.CLAUDE_BULK_MAX_OUTPUT_TOKENS, OUTPUT_TOKENS_PER_ISSUE * len(chunk) + 100),
+            temperature=0.0,
+            system=JSON_SYSTEM_MESSAGE,
+        )
+        match = _JSON_ARRAY_RE.search(text or "")
+        if not match:
+            raise ValueError("Claude response did not contain a JSON array")
+        items = json.loads(match.group(0))
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json={
-                        "model": "claude-3-sonnet-20240229",
-                        "max_tokens": 1024,
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": prompt,
-                            }
-                        ],
-                    },
-                    timeout=30.0,
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Parse Claude's response
-                content = data.get("content", [])
-                if content and len(content) > 0:
-                    text = content[0].get("text", "")
-                    # TODO: Parse JSON from Claude's response
-                    # For now, return a simple recommendation
-                    return {
-                        "assignee": "developer1",
-                        "reasoning": text[:200] if text else "Recommended based on AI analysis",
-                    }
-                
-                return {
-                    "assignee": "developer1",
-                    "reasoning": "AI analysis completed",
-                }
-            except Exception as e:
-                print(f"Error calling Claude API: {e}")
-                return {
-                    "assignee": "developer1",
-                    "reasoning": f"AI service error: {str(e)}",
+        picks = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            issue_id = str(item.get("issue_id"))
+            entry = plan_by_id.get(issue_id)
+            if entry is None:
+                continue
+            names = {c["name"].lower(): c["name"] for c in entry["candidates"]}
+            assignee = item.get("assignee")
+            if isinstance(assignee, str) and assignee.lower() in names:
+                picks[issue_id] = {
+                    "assignee": names[assignee.lower()],
+                    "reasoning": str(item.get("reasoning", "")).strip(),
                 }
+        return picks
+
+    def _format_bulk_issue(self, issue: dict, candidates: List[dict]) -> str:
+        description = (issue.get("description") or "")[:300]
+        labels = ", ".join(issue.get("labels") or []) or "none"
+        names = ", ".join(c["name"] for c in candidates)
+        return (
+            f"- id: {issue.get('id')} | title: {issue.get('title', '')} | labels: {labels}"
+            f" | priority: {issue.get('priority', 'medium')} | description: {description or 'none'}"
+            f" | candidates: {names}"
+        )
+
+    def _least_loaded(self, candidates: List[dict], counts: dict, cap: int) -> Optional[str]:
+        """Best-ranked candidate still under the batch cap"""
+        for candidate in candidates:
+            if counts.get(candidate["name"], 0) < cap:
+                return candidate["name"]
+        return None
+
+    def rank_candidates(
+        self,
+        issue_title: str,
+        issue_description: Optional[str] = None,
+        developers: Optional[List[dict]] = None,
+        labels: Optional[List[str]] = None,
+        issues: Optional[List[dict]] = None,
+    ) -> List[dict]:
+        """Top-k developers for an issue from the local scoring engine"""
+        if issues is None:
+            # Imported lazily: routes import services, not the other way round
+            from app.routes.dashboard import dashboard_data
+            issues = dashboard_data.get("issues", [])
+        profiles = build_developer_profiles(issues, developers)
+        if developers:
+            # An explicit developer list is the pool to choose from
+            available = {dev.get("name") for dev in developers}
+            profiles = {name: p for name, p in profiles.items() if name in available}
+        return rank_developers(issue_title, issue_description, profiles, labels, top_k=self.top_k)
+
+    def _local_recommendation(self, candidates: List[dict]) -> dict:
+        best = candidates[0]
+        skills = ", ".join(best["matched_skills"]) or "no direct skill overlap"
+        return {
+            "assignee": best["name"],
+            "reasoning": (
+                f"Top local match ({skills}) with {best['open_issues']} open issue(s)."
+            ),
+            "source": "local",
+            "candidates": candidates,
+        }
 
-    def _format_developers(self, developers: List[dict]) -> str:
-        """Format developer list for prompt"""
-        if not developers:
-            return "No developers available"
-        
+    def _parse_assignment(self, text: str, candidates: List[dict]) -> Optional[dict]:
+        """Extract and validate the JSON answer; None if it doesn't match the schema"""
+        match = _JSON_OBJECT_RE.search(text or "")
+        if not match:
+            return None
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        assignee = data.get("assignee")
+        reasoning = data.get("reasoning")
+        names = {c["name"].lower(): c["name"] for c in candidates}
+        if not isinstance(assignee, str) or assignee.lower() not in names or not isinstance(reasoning, str):
+            return None
+        return {"assignee": names[assignee.lower()], "reasoning": reasoning.strip()}
+
+    def _format_candidates(self, candidates: List[dict]) -> str:
+        """Format shortlisted developers for the prompt"""
         formatted = []
-        for dev in developers:
-            name = dev.get("name", "Unknown")
-            workload = dev.get("workload", "Unknown")
-            skills = dev.get("skills", [])
-            formatted.append(f"- {name}: Workload: {workload}, Skills: {', '.join(skills)}")
-        
+        for c in candidates:
+            skills = ", ".join(c["matched_skills"]) or "none"
+            formatted.append(
+                f"- {c['name']}: matching skills: {skills}; open issues: {c['open_issues']}; "
+                f"workload score: {c['workload']}"
+            )
         return "\n".join(formatted)
-
@@ -0,0 +1,146 @@
+"""
+Local developer ranking for issue assignment
+Scores developers on skill overlap with an issue and their current open workload,
+so only a short list goes to Claude and a zero-latency answer exists when the API is down
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Statuses that no longer count towards a developer's workload
+DONE_STATUSES = {"closed", "done", "resolved", "merged"}
+
+# Heavier tickets weigh more on workload
+PRIORITY_WEIGHTS = {"critical": 3.0, "high": 2.0, "medium": 1.0, "low": 0.5}
+
+# Relative weight of skill match vs. workload in the final score
+SKILL_WEIGHT = 1.0
+WORKLOAD_WEIGHT = 0.15
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "into", "this", "that", "add", "fix", "new", "use",
+    "update", "issue", "bug", "feature", "when", "not", "are", "was", "should", "can", "all",
+}
+
+
+def tokenize(text: Optional[str]) -> set:
+    """Lowercase keyword set used for skill matching"""
+    if not text:
+        return set()
+    return {t.strip(".-") for t in _TOKEN_RE.findall(text.lower()) if len(t) > 2 and t not in _STOPWORDS}
+
+
+def build_developer_profiles(
+    issues: Iterable[dict],
+    developers: Optional[List[dict]] = None,
+) -> Dict[str, dict]:
+    """Build per-developer skills and workload from known issues.
+
+    Args:
+        issues: Issues as stored in dashboard_data (title, status, assignee, priority, labels)
+        developers: Optional explicit developer list ({"name", "skills", "workload"})
+
+    Returns:
+        Mapping of developer name to {"name", "skills", "open_issues", "workload"}
+    """
+    profiles: Dict[str, dict] = {}
+
+    def profile(name: str) -> dict:
+        if name not in profiles:
+            profiles[name] = {"name": name, "skills": set(), "open_issues": 0, "workload": 0.0}
+        return profiles[name]
+
+    for dev in developers or []:
+        name = dev.get("name")
+        if not name:
+            continue
+        entry = profile(name)
+        for skill in dev.get("skills", []) or []:
+            entry["skills"] |= tokenize(skill)
+        if isinstance(dev.get("workload"), (int, float)):
+            entry["workload"] += float(dev["workload"])
+
+    for issue in issues:
+        assignee = issue.get("assignee")
+        if not assignee:
+            continue
+        entry = profile(assignee)
+        # Past and current work both say something about expertise
+        entry["skills"] |= tokenize(issue.get("title"))
+        for label in issue.get("labels") or []:
+            entry["skills"] |= tokenize(label)
+
+        if str(issue.get("status", "")).lower() not in DONE_STATUSES:
+            entry["open_issues"] += 1
+            entry["workload"] += PRIORITY_WEIGHTS.get(str(issue.get("priority", "medium")).lower(), 1.0)
+
+    return profiles
+
+
+def rank_developers(
+    issue_title: str,
+    issue_description: Optional[str],
+    profiles: Dict[str, dict],
+    labels: Optional[List[str]] = None,
+    top_k: int = 3,
+) -> List[dict]:
+    """Rank developers for an issue, best first.
+
+    Returns:
+        Up to top_k candidates with "name", "score", "matched_skills", "open_issues", "workload"
+    """
+    issue_terms = tokenize(issue_title) | tokenize(issue_description)
+    for label in labels or []:
+        issue_terms |= tokenize(label)
+
+    ranked = []
+    for dev in profiles.values():
+        matched = issue_terms & dev["skills"]
+        skill_score = len(matched) / len(issue_terms) if issue_terms else 0.0
+        score = SKILL_WEIGHT * skill_score - WORKLOAD_WEIGHT * dev["workload"]
+        ranked.append({
+            "name": dev["name"],
+            "score": round(score, 4),
+            "matched_skills": sorted(matched),
+            "open_issues": dev["open_issues"],
+            "workload": round(dev["workload"], 2),
+        })
+
+    # Ties go to the less loaded developer, then alphabetically for stable output
+    ranked.sort(key=lambda c: (-c["score"], c["workload"], c["name"]))
+    return ranked[:top_k]
+
+
+def plan_balanced_assignments(
+    issues: List[dict],
+    profiles: Dict[str, dict],
+    top_k: int = 3,
+) -> List[dict]:
+    """Greedy batch assignment that keeps workload balanced.
+
+    Issues are placed highest priority first; after each placement the chosen
+    developer's workload grows, so later issues favour less loaded developers.
+    Profiles are copied, not modified.
+
+    Returns:
+        One entry per issue: {"issue_id", "assignee", "candidates"}
+    """
+    working = {name: dict(p) for name, p in profiles.items()}
+    order = sorted(
+        range(len(issues)),
+        key=lambda i: -PRIORITY_WEIGHTS.get(str(issues[i].get("priority", "medium")).lower(), 1.0),
+    )
+
+    plan: List[Optional[dict]] = [None] * len(issues)
+    for i in order:
+        issue = issues[i]
+        candidates = rank_developers(
+            issue.get("title", ""), issue.get("description"), working, issue.get("labels"), top_k=top_k
+        )
+        assignee = candidates[0]["name"] if candidates else None
+        if assignee:
+            weight = PRIORITY_WEIGHTS.get(str(issue.get("priority", "medium")).lower(), 1.0)
+            working[assignee]["workload"] += weight
+            working[assignee]["open_issues"] += 1
+        plan[i] = {"issue_id": str(issue.get("id")), "assignee": assignee, "candidates": candidates}
+    return plan
@@ -4,9 +4,10 @@ Supports Google and GitHub OAuth 2.0 flows
 """
 import os
 from typing import Optional, Dict
-import httpx
 from dotenv import load_dotenv
 
+from app.services.http_clients import http_clients
+
 load_dotenv()
 
 class OAuthService:
@@ -50,58 +51,58 @@ class OAuthService:
     
     async def exchange_google_code(self, code: str) -> Dict:
         """Exchange Google authorization code for access token"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data={
-                    "code": code,
-                    "client_id": self.google_client_id,
-                    "client_secret": self.google_client_secret,
-                    "redirect_uri": self.redirect_uri,
-                    "grant_type": "authorization_code"
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        url = "https://oauth2.googleapis.com/token"
+        response = await http_clients.client_for(url).post(
+            url,
+            data={
+                "code": code,
+                "client_id": self.google_client_id,
+                "client_secret": self.google_client_secret,
+                "redirect_uri": self.redirect_uri,
+                "grant_type": "authorization_code"
+            }
+        )
+        response.raise_for_status()
+        return response.json()
     
     async def exchange_github_code(self, code: str) -> Dict:
         """Exchange GitHub authorization code for access token"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://github.com/login/oauth/access_token",
-                data={
-                    "code": code,
-                    "client_id": self.github_client_id,
-                    "client_secret": self.github_client_secret,
-                    "redirect_uri": self.redirect_uri
-                },
-                headers={"Accept": "application/json"}
-            )
-            response.raise_for_status()
-            return response.json()
+        url = "https://github.com/login/oauth/access_token"
+        response = await http_clients.client_for(url).post(
+            url,
+            data={
+                "code": code,
+                "client_id": self.github_client_id,
+                "client_secret": self.github_client_secret,
+                "redirect_uri": self.redirect_uri
+            },
+            headers={"Accept": "application/json"}
+        )
+        response.raise_for_status()
+        return response.json()
     
     async def get_google_user_info(self, access_token: str) -> Dict:
         """Get user information from Google"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://www.googleapis.com/oauth2/v2/userinfo",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            response.raise_for_status()
-            return response.json()
+        url = "https://www.googleapis.com/oauth2/v2/userinfo"
+        response = await http_clients.client_for(url).get(
+            url,
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        response.raise_for_status()
+        return response.json()
     
     async def get_github_user_info(self, access_token: str) -> Dict:
         """Get user information from GitHub"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.github.com/user",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/json"
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        url = "https://api.github.com/user"
+        response = await http_clients.client_for(url).get(
+            url,
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Accept": "application/json"
+            }
+        )
+        response.raise_for_status()
+        return response.json()
 
 
 # Global instance
@@ -0,0 +1,265 @@
+"""
+Local fast path for chatbot data questions
+Answers lookup-style questions ("how many open issues?", "sprint 3 progress") straight from
+the dashboard state, sprints and anomalies, and supplies computed facts to Claude otherwise
+"""
+import re
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.assignment_engine import DONE_STATUSES
+from app.services.storage import anomaly_repository, dashboard_state, sprint_repository
+
+IN_PROGRESS_STATUSES = {"in-progress", "in-development", "in-review", "review", "code-review"}
+
+# Keep injected facts small; they are prepended to the prompt
+MAX_FACT_LINES = 25
+
+
+def _question(pattern: str) -> re.Pattern:
+    """An intent must be the whole question (bar trailing punctuation): any extra qualifier
+    such as an assignee, sprint, label or date changes the answer, so those go to Claude"""
+    return re.compile(rf"\s*(?:{pattern})\s*[?.!]*\s*", re.I)
+
+
+def _normalize_status(status: Optional[str]) -> str:
+    return re.sub(r"[\s_]+", "-", str(status or "").strip().lower())
+
+
+def _status_group(status: str) -> str:
+    if status in DONE_STATUSES:
+        return "closed"
+    if status in IN_PROGRESS_STATUSES:
+        return "in-progress"
+    return "open"
+
+
+def _load_sources() -> Tuple[dict, list, list]:
+    """Current dashboard state, sprints and anomalies"""
+    return dashboard_state, sprint_repository.all(), anomaly_repository.all()
+
+
+class ProjectIndex:
+    """Precomputed lookups over the in-memory project data"""
+
+    def __init__(self, issues: List[dict], sprints: List[dict], anomalies: List[dict]):
+        self.issues = issues
+        self.sprints = sprints
+        self.anomalies = anomalies
+
+        self.status_counts: Counter = Counter()
+        self.by_assignee: Dict[str, List[dict]] = defaultdict(list)
+        self.load_by_assignee: Dict[str, Counter] = defaultdict(Counter)
+        self.unassigned: List[dict] = []
+        for issue in issues:
+            group = _status_group(_normalize_status(issue.get("status")))
+            self.status_counts[group] += 1
+            assignee = issue.get("assignee")
+            if assignee:
+                self.by_assignee[assignee.lower()].append(issue)
+                self.load_by_assignee[group][assignee] += 1
+            elif group != "closed":
+                self.unassigned.append(issue)
+
+        self.anomalies_by_severity: Dict[str, List[dict]] = defaultdict(list)
+        for anomaly in anomalies:
+            self.anomalies_by_severity[str(anomaly.get("severity", "")).lower()].append(anomaly)
+
+    def find_sprint(self, token: str) -> Optional[dict]:
+        """Match a sprint by id, by name ("Sprint 3") or by 1-based position"""
+        token = token.lower().strip()
+        for sprint in self.sprints:
+            if str(sprint.get("id", "")).lower() == token:
+                return sprint
+        for sprint in self.sprints:
+            name = str(sprint.get("name", "")).lower()
+            if re.search(rf"\bsprint\s*{re.escape(token)}\b", name) or name == token:
+                return sprint
+        if token.isdigit() and 0 < int(token) <= len(self.sprints):
+            return self.sprints[int(token) - 1]
+        return None
+
+
+def _sprint_summary(sprint: dict) -> str:
+    stories = sprint.get("userStories", []) or []
+    done = sum(1 for s in stories if _normalize_status(s.get("status")) in DONE_STATUSES)
+    total_points = sprint.get("totalStoryPoints") or sum(s.get("storyPoints", 0) for s in stories)
+    completed_points = sprint.get("completedStoryPoints", 0)
+    progress = sprint.get("progress")
+    if progress is None:
+        progress = int(completed_points / total_points * 100) if total_points else 0
+    return (
+        f"{sprint.get('name', sprint.get('id'))}: {progress}% complete "
+        f"({completed_points}/{total_points} story points, {done}/{len(stories)} stories done)"
+    )
+
+
+class ChatFastPath:
+    """Intent matcher that answers supported questions without an LLM call"""
+
+    def __init__(self, sources: Callable[[], Tuple[dict, list, list]] = _load_sources):
+        self._sources = sources
+        self._index: Optional[ProjectIndex] = None
+        self._index_key: Optional[tuple] = None
+        self.total = 0
+        self.answered = 0
+        self.by_intent: Counter = Counter()
+
+        # Answered locally:            Deferred to Claude (with facts):
+        #   how many open issues?         how many issues are assigned to bob?
+        #   show unassigned tickets       how many issues are in sprint 3?
+        #   what's in sprint 2?           how many bugs were opened this week?
+        #   sprint 3 progress             who has the most open issues in sprint 2?
+        self._intents = [
+            ("count_issues", _question(
+                r"how many\s+(?:(open|closed|done|in[\s-]?progress)\s+)?(?:issues|tickets)"
+                r"(?:\s+(?:are\s+there|do\s+we\s+have))?(?:\s+in\s+total)?"), self._count_issues),
+            ("unassigned", _question(
+                r"(?:(?:list|show)(?:\s+me)?\s+(?:the\s+|all\s+)?|(?:what|which)\s+are\s+the\s+|how\s+many\s+)?"
+                r"unassigned\s+(?:issues|tickets)(?:\s+(?:are\s+there|do\s+we\s+have))?"), self._unassigned),
+            ("top_assignee", _question(
+                r"who\s+(?:has|owns|is working on)\s+the\s+most\s+(?:(open|closed|in[\s-]?progress)\s+)?(?:issues|tickets)"),
+             self._top_assignee),
+            ("assignee_issues", _question(
+                r"(?:what\s+is|what's)\s+@?([\w.-]+)\s+working\s+on"
+                r"|(?:(?:list|show)(?:\s+me)?\s+)?(?:the\s+)?(?:issues|tickets)\s+(?:assigned\s+to|for)\s+@?([\w.-]+)"),
+             self._assignee_issues),
+            ("sprint_progress", _question(
+                r"(?:what(?:'s|\s+is)\s+(?:the\s+)?)?sprint\s*([\w-]+?)(?:'s)?\s+progress"
+                r"|(?:what(?:'s|\s+is)\s+(?:the\s+)?)?progress\s+(?:of|for|on)\s+sprint\s*([\w-]+)"
+                r"|how\s+is\s+sprint\s*([\w-]+)\s+(?:going|doing)"),
+             self._sprint_progress),
+            ("sprint_contents", _question(r"what(?:'s|\s+is)\s+in\s+sprint\s*([\w-]+)"), self._sprint_contents),
+            ("anomalies", _question(
+                r"(?:how\s+many|list|show(?:\s+me)?)\s+(?:the\s+|all\s+)?(?:(high|medium|low)[\s-]severity\s+)?"
+                r"anomal(?:y|ies)(?:\s+(?:are\s+there|were\s+detected|have\s+been\s+detected))?"),
+             self._anomalies),
+        ]
+
+    def answer(self, question: str) -> Optional[str]:
+        """Answer from local data, or None if the question needs Claude"""
+        self.total += 1
+        index = self._get_index()
+        for name, pattern, handler in self._intents:
+            match = pattern.fullmatch(question)
+            if not match:
+                continue
+            groups = [g for g in match.groups() if g]
+            answer = handler(index, groups[0] if groups else None)
+            if answer is not None:
+                self.answered += 1
+                self.by_intent[name] += 1
+                return answer
+        return None
+
+    def facts_for(self, question: str) -> List[str]:
+        """Computed facts relevant to a question, for injection into the Claude prompt"""
+        index = self._get_index()
+        text = question.lower()
+        facts: List[str] = []
+
+        if index.issues and re.search(r"issue|ticket|bug|assign|workload|backlog|open|closed", text):
+            counts = ", ".join(f"{n} {status}" for status, n in index.status_counts.most_common())
+            facts.append(f"Issues: {len(index.issues)} total ({counts}); {len(index.unassigned)} unassigned.")
+            busiest = index.load_by_assignee["in-progress"] + index.load_by_assignee["open"]
+            for name, n in busiest.most_common(5):
+                facts.append(f"{name} has {n} open/in-progress issue(s).")
+            for name, issues in index.by_assignee.items():
+                if re.search(rf"\b{re.escape(name)}\b", text):
+                    titles = "; ".join(i.get("title", "") for i in issues[:5])
+                    facts.append(f"{issues[0].get('assignee')} is assigned: {titles}")
+
+        if index.sprints and "sprint" in text:
+            for sprint in index.sprints:
+                facts.append(_sprint_summary(sprint))
+
+        if index.anomalies and re.search(r"anomal|risk|stale|blocked|problem", text):
+            severities = ", ".join(f"{len(v)} {k}" for k, v in index.anomalies_by_severity.items())
+            facts.append(f"Workflow anomalies: {len(index.anomalies)} ({severities} severity).")
+            for anomaly in index.anomalies[:5]:
+                facts.append(f"Anomaly ({anomaly.get('severity')}): {anomaly.get('title')}")
+
+        return facts[:MAX_FACT_LINES]
+
+    def stats(self) -> Dict:
+        return {
+            "questions": self.total,
+            "answered_locally": self.answered,
+            "fast_path_ratio": round(self.answered / self.total, 4) if self.total else 0.0,
+            "by_intent": dict(self.by_intent),
+        }
+
+    def _get_index(self) -> ProjectIndex:
+        dashboard_data, sprints, anomalies = self._sources()
+        issues = dashboard_data.get("issues", [])
+        # Issues are replaced wholesale on sync and repository lists are rebuilt after every
+        # write, so identity + timestamp detects changes
+        key = (id(issues), len(issues), dashboard_data.get("last_updated"), id(sprints), id(anomalies))
+        if self._index is None or key != self._index_key:
+            self._index = ProjectIndex(issues, sprints, anomalies)
+            self._index_key = key
+        return self._index
+
+    # -- intent handlers: return None to defer to Claude --------------------
+
+    def _count_issues(self, index: ProjectIndex, status: Optional[str]) -> Optional[str]:
+        if not index.issues:
+            return None
+        if status:
+            group = _status_group(_normalize_status(status))
+            return f"There are **{index.status_counts[group]}** {group} issues."
+        breakdown = ", ".join(f"{n} {s}" for s, n in index.status_counts.most_common())
+        return f"There are **{len(index.issues)}** issues in total ({breakdown})."
+
+    def _unassigned(self, index: ProjectIndex, _: Optional[str]) -> Optional[str]:
+        if not index.issues:
+            return None
+        if not index.unassigned:
+            return "All open issues are assigned."
+        lines = "\n".join(f"- {i.get('title')} ({i.get('priority', 'medium')})" for i in index.unassigned[:10])
+        more = f"\n- ...and {len(index.unassigned) - 10} more" if len(index.unassigned) > 10 else ""
+        return f"There are **{len(index.unassigned)}** unassigned open issues:\n{lines}{more}"
+
+    def _top_assignee(self, index: ProjectIndex, status: Optional[str]) -> Optional[str]:
+        group = _status_group(_normalize_status(status)) if status else "in-progress"
+        load = index.load_by_assignee.get(group)
+        if not load:
+            return None
+        name, count = load.most_common(1)[0]
+        return f"**{name}** has the most {group} issues ({count})."
+
+    def _assignee_issues(self, index: ProjectIndex, name: Optional[str]) -> Optional[str]:
+        issues = index.by_assignee.get((name or "").lower())
+        if not issues:
+            return None
+        lines = "\n".join(f"- {i.get('title')} ({i.get('status')})" for i in issues[:10])
+        return f"**{issues[0].get('assignee')}** is assigned {len(issues)} issue(s):\n{lines}"
+
+    def _sprint_progress(self, index: ProjectIndex, token: Optional[str]) -> Optional[str]:
+        sprint = index.find_sprint(token or "")
+        if sprint is None:
+            return None
+        return f"**{_sprint_summary(sprint)}**"
+
+    def _sprint_contents(self, index: ProjectIndex, token: Optional[str]) -> Optional[str]:
+        sprint = index.find_sprint(token or "")
+        if sprint is None:
+            return None
+        stories = sprint.get("userStories", []) or []
+        lines = "\n".join(
+            f"- {s.get('title')} ({s.get('storyPoints', 0)} pts, {s.get('status', 'todo')})" for s in stories
+        )
+        goal = f"Goal: {sprint.get('goal')}\n" if sprint.get("goal") else ""
+        return f"**{sprint.get('name', sprint.get('id'))}** has {len(stories)} user stories.\n{goal}{lines}"
+
+    def _anomalies(self, index: ProjectIndex, severity: Optional[str]) -> Optional[str]:
+        if not index.anomalies:
+            return None
+        items = index.anomalies_by_severity.get(severity.lower(), []) if severity else index.anomalies
+        label = f"{severity.lower()} severity " if severity else ""
+        lines = "\n".join(f"- {a.get('title')} ({a.get('severity')})" for a in items[:10])
+        return f"There are **{len(items)}** {label}anomalies detected.\n{lines}".rstrip()
+
+
+# Global instance
+chat_fast_path = ChatFastPath()
@@ -0,0 +1,217 @@
+"""
+Server-side chat sessions with bounded, compacted history
+Sessions live in an LRU store with idle TTL eviction; once a session's history passes a
+token threshold, older turns are folded into a rolling summary so prompts stay a constant size
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.tokens import CHARS_PER_TOKEN, estimate_tokens
+from anthropic_client import FAST_TIER, generate_claude_message
+
+logger = logging.getLogger(__name__)
+
+USAGE_KEYS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and a project-management "
+    "assistant. Merge the previous summary and the new turns into one concise summary. Keep names, "
+    "ticket ids, numbers and open questions; drop pleasantries. Reply with the summary only."
+)
+
+
+class ChatSession:
+    """One conversation: recent turns, a rolling summary of older ones, and token usage"""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.turns: List[Dict[str, str]] = []
+        self.summary = ""
+        self.summarized_turns = 0
+        self.compactions = 0
+        self.usage: Dict[str, int] = {key: 0 for key in USAGE_KEYS}
+        self.summary_usage: Dict[str, int] = {key: 0 for key in USAGE_KEYS}
+        self._lock = asyncio.Lock()
+
+    def add_exchange(self, question: str, answer: str, usage: Optional[Dict[str, int]] = None) -> None:
+        self.turns.append({"role": "user", "content": question})
+        self.turns.append({"role": "assistant", "content": answer})
+        _add_usage(self.usage, usage)
+        self.last_used = time.monotonic()
+
+    def history_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(t["content"]) for t in self.turns)
+
+    def last_question(self) -> Optional[str]:
+        for turn in reversed(self.turns):
+            if turn["role"] == "user":
+                return turn["content"]
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            "session_id": self.id,
+            "created_at": self.created_at,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            "turns": len(self.turns) // 2,
+            "summarized_turns": self.summarized_turns,
+            "compactions": self.compactions,
+            "history_tokens": self.history_tokens(),
+            "summary": self.summary,
+            "usage": dict(self.usage),
+            "summary_usage": dict(self.summary_usage),
+        }
+
+
+def _add_usage(totals: Dict[str, int], usage: Optional[Dict[str, int]]) -> None:
+    for key, value in (usage or {}).items():
+        if key in totals and isinstance(value, int):
+            totals[key] += value
+
+
+class ChatSessionStore:
+    """LRU store of chat sessions, bounded by count and evicted after an idle TTL"""
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 1800.0,
+        history_token_limit: int = 2000,
+        keep_turns: int = 4,
+        summary_max_tokens: int = 300,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.history_token_limit = history_token_limit
+        # Exchanges (question + answer) kept verbatim after compaction
+        self.keep_turns = keep_turns
+        self.summary_max_tokens = summary_max_tokens
+        # Most recently used sessions at the end
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._tasks: set = set()
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.compactions = 0
+        self.compaction_failures = 0
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Return a live session and mark it recently used, or None if unknown or expired"""
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id: Optional[str] = None) -> ChatSession:
+        """Resume session_id if it is still live, otherwise start a new session under that id"""
+        if session_id:
+            session = self.get(session_id)
+            if session is not None:
+                return session
+        session = ChatSession(session_id or uuid.uuid4().hex)
+        self._sessions[session.id] = session
+        self.created += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def record(self, session: ChatSession, question: str, answer: str, usage: Optional[Dict[str, int]] = None) -> None:
+        """Append an exchange and schedule compaction in the background if history is too long"""
+        session.add_exchange(question, answer, usage)
+        if session.history_tokens() > self.history_token_limit and not session._lock.locked():
+            task = asyncio.ensure_future(self.compact(session))
+            # Keep a reference so the task is not garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def compact(self, session: ChatSession) -> None:
+        """Fold all but the most recent exchanges into the rolling summary"""
+        async with session._lock:
+            cut = len(session.turns) - self.keep_turns * 2
+            if cut <= 0 or session.history_tokens() <= self.history_token_limit:
+                return
+            old_turns = session.turns[:cut]
+            try:
+                summary, usage = await self._summarize(session.summary, old_turns)
+            except Exception as exc:  # Runs in the background: never let a failed summary escape
+                logger.warning("Chat summary failed for session %s, truncating instead: %s", session.id, exc)
+                summary, usage = self._fallback_summary(session.summary, old_turns), {}
+                self.compaction_failures += 1
+
+            # Turns recorded while summarizing are after `cut` and are kept
+            session.turns = session.turns[cut:]
+            session.summary = summary
+            session.summarized_turns += len(old_turns) // 2
+            session.compactions += 1
+            _add_usage(session.summary_usage, usage)
+            self.compactions += 1
+
+    async def _summarize(self, previous: str, turns: List[Dict[str, str]]) -> tuple:
+        transcript = "\n".join(f"{t['role'].title()}: {t['content']}" for t in turns)
+        prompt = f"Previous summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+        result = await asyncio.wait_for(
+            generate_claude_message(
+                prompt,
+                model=FAST_TIER.model,
+                max_tokens=self.summary_max_tokens,
+                system=SUMMARY_INSTRUCTIONS,
+                use_cache=False,
+            ),
+            timeout=FAST_TIER.timeout,
+        )
+        return result.text.strip(), result.usage
+
+    def _fallback_summary(self, previous: str, turns: List[Dict[str, str]]) -> str:
+        """Keep the start of each old turn, newest last, within the summary budget"""
+        lines = [previous] if previous else []
+        lines += [f"{t['role'].title()}: {t['content'][:200]}" for t in turns]
+        budget = self.summary_max_tokens * CHARS_PER_TOKEN
+        text = "\n".join(lines)
+        return text[-budget:] if len(text) > budget else text
+
+    def stats(self) -> Dict:
+        self._expire()
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "history_token_limit": self.history_token_limit,
+            "created": self.created,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "compactions": self.compactions,
+            "compaction_failures": self.compaction_failures,
+        }
+
+    def _expire(self) -> None:
+        # LRU order means idle sessions are at the front
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used > cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self.expirations += 1
+
+
+# Global instance
+chat_sessions = ChatSessionStore(
+    max_sessions=settings.CHAT_SESSION_MAX_SESSIONS,
+    ttl_seconds=settings.CHAT_SESSION_TTL,
+    history_token_limit=settings.CHAT_SESSION_HISTORY_TOKENS,
+    keep_turns=settings.CHAT_SESSION_KEEP_TURNS,
+    summary_max_tokens=settings.CHAT_SESSION_SUMMARY_TOKENS,
+)
@@ -0,0 +1,267 @@
+"""
+Per-host circuit breakers with budgeted, jittered retries
+After enough consecutive upstream failures a host's circuit opens and calls fail fast
+(callers may fall back to a cached value) until a cool-down passes; then a few probe
+calls decide whether it closes again. Idempotent calls are retried with exponential
+full-jitter backoff, limited by a per-host retry budget so retries cannot pile onto an
+upstream that is already struggling.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.config import settings
+from app.services.telemetry import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Worth another attempt on an idempotent call
+RETRY_STATUSES = {429, 500, 502, 503, 504, 529}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a host whose circuit is open"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Circuit open for {host}; retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def is_failure_status(status_code: int) -> bool:
+    """Server-side errors count against the host; 4xx answers mean it is up"""
+    return status_code >= 500
+
+
+class CircuitBreaker:
+    """closed -> open after failure_threshold consecutive failures; open -> half-open after
+    reset_timeout; half-open admits half_open_max_calls probes and closes on a success"""
+
+    def __init__(
+        self,
+        host: str,
+        metrics: MetricsRegistry,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        retry_budget_ratio: float = 0.2,
+        retry_budget_burst: float = 10.0,
+    ):
+        self.host = host
+        self.metrics = metrics
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.retry_budget_ratio = retry_budget_ratio
+        self.retry_budget_burst = retry_budget_burst
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        # Each call earns retry_budget_ratio of a retry, banked up to retry_budget_burst
+        self._retry_tokens = float(retry_budget_burst)
+        self.counts = {"calls": 0, "failures": 0, "rejected": 0, "retries": 0, "retries_denied": 0}
+        self.transitions: List[dict] = []
+
+    def allow(self) -> None:
+        """Admit a call or raise CircuitOpenError"""
+        if self.state == OPEN:
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                self.counts["rejected"] += 1
+                self.metrics.inc("upstream_circuit_rejections_total", host=self.host)
+                raise CircuitOpenError(self.host, remaining)
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                self.counts["rejected"] += 1
+                self.metrics.inc("upstream_circuit_rejections_total", host=self.host)
+                raise CircuitOpenError(self.host, self.reset_timeout)
+            self._probes += 1
+        self.counts["calls"] += 1
+        self._retry_tokens = min(self._retry_tokens + self.retry_budget_ratio, self.retry_budget_burst)
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state == HALF_OPEN:
+            self._transition(CLOSED)
+
+    def record_failure(self, reason: str) -> None:
+        self.counts["failures"] += 1
+        self.consecutive_failures += 1
+        self.metrics.inc("upstream_failures_total", host=self.host, reason=reason)
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            if self.state != OPEN:
+                self._transition(OPEN)
+
+    def record_status(self, status_code: int) -> None:
+        if is_failure_status(status_code):
+            self.record_failure(str(status_code))
+        else:
+            self.record_success()
+
+    def release(self) -> None:
+        """End a call that told us nothing about the host (e.g. it was cancelled)"""
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def take_retry(self) -> bool:
+        if self._retry_tokens >= 1:
+            self._retry_tokens -= 1
+            self.counts["retries"] += 1
+            self.metrics.inc("upstream_retries_total", host=self.host)
+            return True
+        self.counts["retries_denied"] += 1
+        self.metrics.inc("upstream_retries_denied_total", host=self.host)
+        return False
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_tokens": round(self._retry_tokens, 2),
+            **self.counts,
+            "recent_transitions": self.transitions[-10:],
+        }
+
+    def _transition(self, state: str) -> None:
+        previous, self.state = self.state, state
+        self._probes = 0
+        if state == CLOSED:
+            self.consecutive_failures = 0
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit for {self.host}: {previous} -> {state}")
+        self.metrics.inc("upstream_circuit_transitions_total", host=self.host, to=state)
+        self.transitions.append({"at": time.time(), "from": previous, "to": state})
+        del self.transitions[:-50]
+
+
+class CircuitBreakerRegistry:
+    """One breaker per upstream host, plus the retry loop for idempotent calls"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        retry_budget_ratio: float = 0.2,
+        retry_budget_burst: float = 10.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget_ratio = retry_budget_ratio
+        self.retry_budget_burst = retry_budget_burst
+        self.metrics = MetricsRegistry()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+        self.metrics.describe("upstream_circuit_transitions_total", "Circuit breaker state changes by host")
+        self.metrics.describe("upstream_circuit_rejections_total", "Calls failed fast by an open circuit")
+        self.metrics.describe("upstream_failures_total", "Upstream failures (5xx or transport errors) by host")
+        self.metrics.describe("upstream_retries_total", "Retries of idempotent upstream calls")
+        self.metrics.describe("upstream_retries_denied_total", "Retries skipped because the host's budget ran out")
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        host = host.lower()
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                host,
+                self.metrics,
+                failure_threshold=self.failure_threshold,
+                reset_timeout=self.reset_timeout,
+                half_open_max_calls=self.half_open_max_calls,
+                retry_budget_ratio=self.retry_budget_ratio,
+                retry_budget_burst=self.retry_budget_burst,
+            )
+        return breaker
+
+    async def call(
+        self,
+        host: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+        idempotent: bool = False,
+    ) -> httpx.Response:
+        """Send through host's breaker; idempotent calls are retried on 429/5xx and transport errors.
+
+        The last response is returned as-is (callers still raise_for_status); the last
+        transport error is re-raised.
+        """
+        breaker = self.breaker(host)
+        attempts = self.max_retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            breaker.allow()
+            try:
+                response = await send()
+            except httpx.TransportError as exc:
+                breaker.record_failure(type(exc).__name__)
+                if attempt + 1 == attempts or not breaker.take_retry():
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+
+            breaker.record_status(response.status_code)
+            if response.status_code not in RETRY_STATUSES or attempt + 1 == attempts or not breaker.take_retry():
+                return response
+            await asyncio.sleep(self._backoff(attempt, _retry_after(response)))
+        raise AssertionError("unreachable")
+
+    def stats(self) -> Dict[str, Dict]:
+        return {host: breaker.stats() for host, breaker in sorted(self._breakers.items())}
+
+    def render(self) -> str:
+        """Prometheus text: counters plus a state gauge (0 closed, 1 half-open, 2 open)"""
+        lines = [
+            "# HELP upstream_circuit_state Circuit state by host (0 closed, 1 half-open, 2 open)",
+            "# TYPE upstream_circuit_state gauge",
+        ]
+        for host, breaker in sorted(self._breakers.items()):
+            lines.append(f'upstream_circuit_state{{host="{host}"}} {_STATE_VALUES[breaker.state]}')
+        return self.metrics.render() + "\n".join(lines) + "\n"
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        # Full jitter: anywhere between 0 and the exponential cap
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+# Global instance
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+    half_open_max_calls=settings.CIRCUIT_HALF_OPEN_MAX_CALLS,
+    max_retries=settings.UPSTREAM_MAX_RETRIES,
+    backoff_base=settings.UPSTREAM_BACKOFF_BASE,
+    backoff_max=settings.UPSTREAM_BACKOFF_MAX,
+    retry_budget_ratio=settings.UPSTREAM_RETRY_BUDGET_RATIO,
+    retry_budget_burst=settings.UPSTREAM_RETRY_BUDGET_BURST,
+)
@@ -0,0 +1,205 @@
+"""
+Local pub/sub bus shared by the uvicorn workers on one host
+A published message goes to the publishing worker's own subscribers and, in "unix" mode,
+to every other worker through a broker on a Unix socket. There is no separate broker
+process: the worker holding the socket's lock file serves it and the others connect; if
+that worker exits, another takes over. Messages are newline-delimited JSON.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any], Awaitable[None]]
+
+LOCAL = "local"
+UNIX = "unix"
+
+# Dashboard snapshots can run to megabytes; asyncio's default line limit is 64 KiB
+_MAX_MESSAGE_BYTES = 32 * 1024 * 1024
+# A worker that stops reading is cut off rather than buffered for without limit
+_MAX_PEER_BUFFER = 16 * 1024 * 1024
+
+
+class EventBus:
+    """Topic-based fan-out to in-process subscribers and, in "unix" mode, to the other workers"""
+
+    def __init__(self, mode: str = LOCAL, socket_path: str = "", reconnect_delay: float = 1.0):
+        if mode not in (LOCAL, UNIX):
+            raise ValueError(f"Unknown EVENT_BUS_MODE {mode!r} (expected 'local' or 'unix')")
+        self.mode = mode
+        self.socket_path = socket_path
+        self.reconnect_delay = reconnect_delay
+        self.role = LOCAL if mode == LOCAL else "connecting"
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Broker: one writer per connected worker. Client: the connection to the broker.
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._upstream: Optional[asyncio.StreamWriter] = None
+        self.stats_counts = {"published": 0, "received": 0, "dropped": 0, "handler_errors": 0}
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    async def publish(self, topic: str, data: Any) -> None:
+        """Deliver to this worker's subscribers, then to every other worker"""
+        await self._deliver(topic, data)
+        self.notify(topic, data)
+
+    def notify(self, topic: str, data: Any) -> None:
+        """Deliver to the other workers only (this one already has the change)"""
+        self.stats_counts["published"] += 1
+        if self.mode == LOCAL:
+            return
+        line = json.dumps({"topic": topic, "data": data}).encode() + b"\n"
+        if self.role == "broker":
+            self._fan_out(line)
+        elif self._upstream is not None and not self._upstream.is_closing():
+            self._upstream.write(line)
+        else:
+            # Between brokers; the other workers will miss this one
+            self.stats_counts["dropped"] += 1
+
+    async def start(self) -> None:
+        """Join the other workers. Called from the app lifespan."""
+        if self.mode == UNIX and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for writer in [*self._peers, *([self._upstream] if self._upstream else [])]:
+            writer.close()
+        self._peers.clear()
+        self._upstream = None
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # releases the lock for the next broker
+            self._lock_fd = None
+        self.role = LOCAL if self.mode == LOCAL else "connecting"
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "role": self.role,
+            "pid": os.getpid(),
+            "peers": len(self._peers),
+            "topics": {topic: len(handlers) for topic, handlers in sorted(self._handlers.items())},
+            **self.stats_counts,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            if self._acquire_broker_lock():
+                await self._serve()
+                return
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=_MAX_MESSAGE_BYTES)
+            except OSError:
+                # The broker's socket isn't up yet (or its worker just exited)
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            self._upstream, self.role = writer, "client"
+            logger.info(f"Event bus: worker {os.getpid()} connected to {self.socket_path}")
+            try:
+                await self._read(reader)
+            finally:
+                self._upstream, self.role = None, "connecting"
+                writer.close()
+            logger.warning(f"Event bus: lost the broker at {self.socket_path}; reconnecting")
+
+    def _acquire_broker_lock(self) -> bool:
+        """Whoever holds the lock file serves the socket; the OS drops it when that worker dies"""
+        fd = os.open(f"{self.socket_path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _serve(self) -> None:
+        # A socket file left behind by a broker that died can't be bound over
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self._server = await asyncio.start_unix_server(
+            self._handle_peer, path=self.socket_path, limit=_MAX_MESSAGE_BYTES
+        )
+        self.role = "broker"
+        logger.info(f"Event bus: worker {os.getpid()} is the broker at {self.socket_path}")
+        await self._server.serve_forever()
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._peers.add(writer)
+        try:
+            await self._read(reader, relay_from=writer)
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _read(self, reader: asyncio.StreamReader, relay_from: Optional[asyncio.StreamWriter] = None) -> None:
+        while True:
+            try:
+                line = await reader.readline()
+            except (ConnectionError, ValueError):  # ValueError: line over the stream limit
+                return
+            if not line:
+                return
+            if relay_from is not None:
+                self._fan_out(line, skip=relay_from)
+            try:
+                message = json.loads(line)
+            except ValueError:
+                logger.warning("Event bus: dropped a malformed message")
+                continue
+            self.stats_counts["received"] += 1
+            await self._deliver(message.get("topic"), message.get("data"))
+
+    def _fan_out(self, line: bytes, skip: Optional[asyncio.StreamWriter] = None) -> None:
+        for writer in list(self._peers):
+            if writer is skip:
+                continue
+            if writer.is_closing():
+                self._peers.discard(writer)
+                continue
+            if writer.transport.get_write_buffer_size() > _MAX_PEER_BUFFER:
+                logger.warning("Event bus: disconnecting a worker that stopped reading")
+                self._peers.discard(writer)
+                writer.close()
+                continue
+            writer.write(line)
+
+    async def _deliver(self, topic: str, data: Any) -> None:
+        for handler in self._handlers.get(topic, []):
+            try:
+                await handler(data)
+            except Exception as e:
+                self.stats_counts["handler_errors"] += 1
+                logger.error(f"Event bus handler for {topic!r} failed: {e}")
+
+
+# Global instance
+event_bus = EventBus(
+    mode=settings.EVENT_BUS_MODE,
+    socket_path=settings.EVENT_BUS_SOCKET_PATH,
+    reconnect_delay=settings.EVENT_BUS_RECONNECT_DELAY,
+)
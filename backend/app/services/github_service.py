@@ -1,32 +1,148 @@
+import asyncio
+import logging
 import httpx
 from app.config import settings
-from typing import List, Optional
+from app.services.circuit_breaker import circuit_breakers
+from app.services.http_cache import http_cache
+from app.services.http_clients import http_clients
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_HOST = "api.github.com"
+
+
+def get_github_client() -> httpx.AsyncClient:
+    # Pooled api.github.com client from the shared registry (GITHUB_HTTP_* limits)
+    return http_clients.client(GITHUB_API_HOST)
+
+
+def _page_number(url: Optional[str]) -> Optional[int]:
+    """Page number from a Link header URL (…?page=7&per_page=100)"""
+    if not url:
+        return None
+    pages = parse_qs(urlparse(url).query).get("page")
+    return int(pages[0]) if pages and pages[0].isdigit() else None
+
 
 class GitHubService:
     def __init__(self):
         self.token = settings.GITHUB_TOKEN
-        self.base_url = "https://api.github.com"
+        self.base_url = f"https://{GITHUB_API_HOST}"
         self.headers = {
             "Authorization": f"token {self.token}",
             "Accept": "application/vnd.github.v3+json",
         } if self.token else {}
 
-    async def get_issues(self, owner: str, repo: str) -> List[dict]:
+    async def get_issues(self, owner: str, repo: str, state: str = "open") -> List[dict]:
         """
-        Fetch issues from a GitHub repository
+        Fetch all issues from a GitHub repository (every page)
+        """
+        issues: List[dict] = []
+        async for page in self.iter_issue_pages(owner, repo, state=state):
+            issues.extend(page)
+        return issues
+
+    async def iter_issues(self, owner: str, repo: str, state: str = "open") -> AsyncIterator[dict]:
+        """
+        Stream issues one at a time as their pages arrive
+        """
+        async with aclosing(self.iter_issue_pages(owner, repo, state=state)) as pages:
+            async for page in pages:
+                for issue in page:
+                    yield issue
+
+    async def iter_issue_pages(
+        self,
+        owner: str,
+        repo: str,
+        state: str = "open",
+        params: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Stream issue pages in order, following the `Link` header
+
+        When the first page names the last page, the remaining pages are
+        fetched concurrently (at most GITHUB_PAGE_CONCURRENCY at a time);
+        otherwise `next` links are followed one by one. A page that still
+        fails after retries raises instead of silently ending the stream, and
+        stopping at GITHUB_MAX_PAGES with pages left is logged as a warning.
         """
         if not self.token:
-            return []
-        
+            return
+
         url = f"{self.base_url}/repos/{owner}/{repo}/issues"
-        async with httpx.AsyncClient() as client:
+        query = {"state": state, "per_page": settings.GITHUB_PER_PAGE, **(params or {})}
+        try:
+            first = await self._get(url, query)
+        except Exception as e:
+            logger.error(f"Error fetching GitHub issues: {e}")
+            raise
+        yield first.json()
+
+        last_page = _page_number(first.links.get("last", {}).get("url"))
+        if last_page is not None:
+            if last_page > settings.GITHUB_MAX_PAGES:
+                logger.warning(
+                    f"GitHub issues for {owner}/{repo} truncated: fetching {settings.GITHUB_MAX_PAGES} "
+                    f"of {last_page} pages (GITHUB_MAX_PAGES)"
+                )
+                last_page = settings.GITHUB_MAX_PAGES
+            async with aclosing(self._fetch_pages_concurrently(url, query, range(2, last_page + 1))) as pages:
+                async for page in pages:
+                    yield page
+            return
+
+        # No `last` link: walk `next` links sequentially
+        next_url = first.links.get("next", {}).get("url")
+        fetched = 1
+        while next_url and fetched < settings.GITHUB_MAX_PAGES:
             try:
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                return response.json()
+                response = await self._get(next_url)
             except Exception as e:
-                print(f"Error fetching GitHub issues: {e}")
-                return []
+                logger.error(f"Error fetching GitHub issues page {fetched + 1}: {e}")
+                raise
+            fetched += 1
+            yield response.json()
+            next_url = response.links.get("next", {}).get("url")
+        if next_url:
+            logger.warning(
+                f"GitHub issues for {owner}/{repo} truncated: stopped after {fetched} pages "
+                f"with more remaining (GITHUB_MAX_PAGES)"
+            )
+
+    async def _fetch_pages_concurrently(
+        self, url: str, query: dict, pages: range
+    ) -> AsyncIterator[List[dict]]:
+        semaphore = asyncio.Semaphore(settings.GITHUB_PAGE_CONCURRENCY)
+
+        async def fetch(page: int) -> List[dict]:
+            async with semaphore:
+                response = await self._get(url, {**query, "page": page})
+                return response.json()
+
+        tasks = [asyncio.ensure_future(fetch(page)) for page in pages]
+        try:
+            # Yield in page order; later pages keep downloading meanwhile
+            for page, task in zip(pages, tasks):
+                try:
+                    yield await task
+                except Exception as e:
+                    logger.error(f"Error fetching GitHub issues page {page}: {e}")
+                    raise
+        finally:
+            # Stop outstanding requests if the caller stops iterating or a page failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _get(self, url: str, params: Optional[dict] = None) -> httpx.Response:
+        # Conditional requests: unchanged pages come back as 304s, which cost no rate limit
+        response = await http_cache.get(get_github_client(), url, headers=self.headers, params=params)
+        response.raise_for_status()
+        return response
 
     async def get_repository_info(self, owner: str, repo: str) -> Optional[dict]:
         """
@@ -34,16 +150,14 @@ class GitHubService:
         """
         if not self.token:
             return None
-        
+
         url = f"{self.base_url}/repos/{owner}/{repo}"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                print(f"Error fetching repository info: {e}")
-                return None
+        try:
+            response = await self._get(url)
+            return response.json()
+        except Exception as e:
+            logger.error(f"Error fetching repository info: {e}")
+            return None
 
     async def assign_issue(self, owner: str, repo: str, issue_number: int, assignee: str) -> bool:
         """
@@ -51,14 +165,15 @@ class GitHubService:
         """
         if not self.token:
             return False
-        
-        url = f"{self.base_url}/repos/{owner}/{repo}/issues/{issue_number}/assignees"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, headers=self.headers, json={"assignees": [assignee]})
-                response.raise_for_status()
-                return True
-            except Exception as e:
-                print(f"Error assigning issue: {e}")
-                return False
 
+        url = f"{self.base_url}/repos/{owner}/{repo}/issues/{issue_number}/assignees"
+        try:
+            response = await circuit_breakers.call(
+                GITHUB_API_HOST,
+                lambda: get_github_client().post(url, headers=self.headers, json={"assignees": [assignee]}),
+            )
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"Error assigning issue: {e}")
+            return False
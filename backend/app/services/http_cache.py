@@ -0,0 +1,252 @@
+"""
+Conditional-request cache for GitHub and Jira GETs
+Stores ETag / Last-Modified validators with response bodies, revalidates with If-None-Match /
+If-Modified-Since and serves 304s from the cache (GitHub does not count 304s against the rate
+limit). While a host is failing or its circuit is open, the last cached body is served
+instead. Memory is a bounded LRU; an optional SQLite file keeps entries across restarts.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import settings
+from app.services.circuit_breaker import CircuitOpenError, circuit_breakers
+from app.services.http_clients import host_of
+
+# Response headers kept with a cached body (Link drives GitHub pagination)
+STORED_HEADERS = ("etag", "last-modified", "link", "content-type", "cache-control")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    def is_fresh(self) -> bool:
+        """Still within the server's max-age, so usable without revalidating"""
+        cache_control = self.headers.get("cache-control", "")
+        if "no-cache" in cache_control:
+            return False
+        match = _MAX_AGE_RE.search(cache_control)
+        return bool(match) and time.time() - self.stored_at < int(match.group(1))
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(self.status_code, headers=self.headers, content=self.body, request=request)
+
+
+class _SQLiteTier:
+    """On-disk tier: one row per URL key, oldest rows trimmed past max_entries"""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS http_cache ("
+            "key TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB, stored_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS http_cache_stored_at ON http_cache (stored_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, stored_at FROM http_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(row[0], json.loads(row[1]), row[2], row[3])
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache (key, status, headers, body, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (key, entry.status_code, json.dumps(entry.headers), entry.body, entry.stored_at),
+            )
+            self._conn.execute(
+                "DELETE FROM http_cache WHERE key IN ("
+                "SELECT key FROM http_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def touch(self, key: str, stored_at: float) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE http_cache SET stored_at = ? WHERE key = ?", (stored_at, key))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM http_cache")
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+
+
+class ConditionalCache:
+    """Validator-aware GET cache: LRU in memory, optionally backed by SQLite"""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 20_000_000,
+        sqlite_path: Optional[str] = None,
+        disk_max_entries: int = 10_000,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._disk = _SQLiteTier(sqlite_path, disk_max_entries) if sqlite_path else None
+        # hits: fresh per max-age, no request; not_modified: revalidated by a 304;
+        # misses: no entry, or the resource changed; stale: served while the host was failing
+        self.stats_counts = {
+            "hits": 0, "not_modified": 0, "misses": 0, "stale": 0, "disk_hits": 0, "stored": 0, "evictions": 0,
+        }
+
+    async def get(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[dict] = None,
+    ) -> httpx.Response:
+        """GET url through the cache. A 304 comes back as the cached 200 response."""
+        headers = dict(headers or {})
+        request = client.build_request("GET", url, headers=headers, params=params)
+        key = self._key(request)
+        entry = await self._lookup(key)
+
+        if entry is not None and entry.is_fresh():
+            self.stats_counts["hits"] += 1
+            return entry.to_response(request)
+
+        if entry is not None:
+            if "etag" in entry.headers:
+                request.headers["If-None-Match"] = entry.headers["etag"]
+            if "last-modified" in entry.headers:
+                request.headers["If-Modified-Since"] = entry.headers["last-modified"]
+
+        try:
+            # Retried with backoff on 429/5xx; fails fast while the host's circuit is open
+            response = await circuit_breakers.call(host_of(str(request.url)), lambda: client.send(request), idempotent=True)
+        except (CircuitOpenError, httpx.TransportError):
+            if entry is None:
+                raise
+            return self._serve_stale(entry, request)
+        if response.status_code >= 500 and entry is not None:
+            return self._serve_stale(entry, request)
+
+        if response.status_code == 304 and entry is not None:
+            self.stats_counts["not_modified"] += 1
+            # Restart the max-age clock; validators may have been refreshed too
+            entry.stored_at = time.time()
+            for name in ("etag", "last-modified", "cache-control"):
+                if name in response.headers:
+                    entry.headers[name] = response.headers[name]
+            self._remember(key, entry)
+            if self._disk is not None:
+                await asyncio.to_thread(self._disk.touch, key, entry.stored_at)
+            return entry.to_response(request)
+
+        self.stats_counts["misses"] += 1
+        if response.status_code == 200 and ("etag" in response.headers or "last-modified" in response.headers):
+            await self._store(key, response)
+        return response
+
+    def _serve_stale(self, entry: CachedResponse, request: httpx.Request) -> httpx.Response:
+        """Last known body for a URL whose host is failing"""
+        self.stats_counts["stale"] += 1
+        response = entry.to_response(request)
+        response.headers["x-cache"] = "stale"
+        return response
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> Dict:
+        served = self.stats_counts["hits"] + self.stats_counts["not_modified"] + self.stats_counts["stale"]
+        lookups = served + self.stats_counts["misses"]
+        return {
+            **self.stats_counts,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "disk_entries": self._disk.count() if self._disk is not None else None,
+        }
+
+    @staticmethod
+    def _key(request: httpx.Request) -> str:
+        # Different credentials may see different data, so they never share entries
+        auth = hashlib.sha256(request.headers.get("authorization", "").encode()).hexdigest()[:16]
+        accept = request.headers.get("accept", "")
+        return f"{auth} {accept} {request.url}"
+
+    async def _lookup(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        if self._disk is None:
+            return None
+        entry = await asyncio.to_thread(self._disk.get, key)
+        if entry is not None:
+            self.stats_counts["disk_hits"] += 1
+            self._remember(key, entry)
+        return entry
+
+    async def _store(self, key: str, response: httpx.Response) -> None:
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        entry = CachedResponse(response.status_code, headers, response.content, time.time())
+        if entry.size > self.max_bytes:
+            return
+        self._remember(key, entry)
+        self.stats_counts["stored"] += 1
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, entry)
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        existing = self._entries.pop(key, None)
+        if existing is not None:
+            self._bytes -= existing.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.stats_counts["evictions"] += 1
+
+
+# Global instance
+http_cache = ConditionalCache(
+    max_entries=settings.HTTP_CACHE_MAX_ENTRIES,
+    max_bytes=settings.HTTP_CACHE_MAX_BYTES,
+    sqlite_path=settings.HTTP_CACHE_SQLITE_PATH or None,
+    disk_max_entries=settings.HTTP_CACHE_DISK_MAX_ENTRIES,
+)
@@ -0,0 +1,153 @@
+"""
+Registry of pooled outbound HTTP clients, one per upstream host
+Every service asks the registry for its host's client instead of opening its own, so
+keep-alive connections are reused across requests. Clients are opened in the app
+lifespan (see main.py) and closed on shutdown; limits come from app/config.py.
+"""
+from dataclasses import asdict, dataclass
+from importlib.util import find_spec
+from threading import Lock
+from typing import Any, Dict
+from urllib.parse import urlparse
+
+import httpx
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class HostLimits:
+    timeout: float = 15.0
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = False  # Only honoured when the optional h2 package is installed
+
+
+def host_of(url: str) -> str:
+    """Registry key for a URL: its host, plus the port when one is given"""
+    return urlparse(url).netloc.lower()
+
+
+class HTTPClientRegistry:
+    """Lazily creates and caches one httpx.AsyncClient per host"""
+
+    def __init__(self, default_limits: HostLimits):
+        self.default_limits = default_limits
+        self._limits: Dict[str, HostLimits] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._requests: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def configure(self, host: str, limits: HostLimits) -> None:
+        """Set the limits used the next time host's client is opened"""
+        if host:
+            self._limits[host.lower()] = limits
+
+    def client(self, host: str) -> httpx.AsyncClient:
+        """Pooled client for host; opened on first use if the lifespan has not done so"""
+        host = host.lower()
+        client = self._clients.get(host)
+        if client is not None and not client.is_closed:
+            return client
+        with self._lock:
+            client = self._clients.get(host)
+            if client is None or client.is_closed:
+                client = self._build(host)
+                self._clients[host] = client
+            return client
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        return self.client(host_of(url))
+
+    async def start(self) -> None:
+        """Open a client for every configured host. Called from the app lifespan."""
+        for host in self._limits:
+            self.client(host)
+
+    async def close_host(self, host: str) -> None:
+        client = self._clients.pop(host.lower(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def close(self) -> None:
+        """Close every client and drop its pooled connections"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def pool_stats(self, host: str) -> Dict[str, Any]:
+        host = host.lower()
+        limits = self._limits.get(host, self.default_limits)
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            return {"open": False, "connections": 0, "in_use": 0, "idle": 0, "queued": 0,
+                    "requests": self._requests.get(host, 0), "limits": asdict(limits)}
+
+        # httpx doesn't expose pool stats publicly; read them from httpcore's pool.
+        pool = getattr(client._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        waiting = [
+            req for req in getattr(pool, "_requests", []) if getattr(req, "connection", None) is None
+        ]
+        return {
+            "open": True,
+            "http2": bool(getattr(pool, "_http2", False)),
+            "connections": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "queued": len(waiting),
+            "requests": self._requests.get(host, 0),
+            "limits": asdict(limits),
+        }
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        hosts = sorted(set(self._limits) | set(self._clients))
+        return {host: self.pool_stats(host) for host in hosts}
+
+    def _build(self, host: str) -> httpx.AsyncClient:
+        limits = self._limits.get(host, self.default_limits)
+
+        async def count_request(request: httpx.Request) -> None:
+            self._requests[host] = self._requests.get(host, 0) + 1
+
+        return httpx.AsyncClient(
+            timeout=limits.timeout,
+            limits=httpx.Limits(
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+            ),
+            http2=limits.http2 and find_spec("h2") is not None,
+            event_hooks={"request": [count_request]},
+        )
+
+
+# Global instance
+http_clients = HTTPClientRegistry(HostLimits(
+    timeout=settings.HTTP_DEFAULT_TIMEOUT,
+    max_connections=settings.HTTP_DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_DEFAULT_MAX_KEEPALIVE,
+    keepalive_expiry=settings.HTTP_DEFAULT_KEEPALIVE_EXPIRY,
+))
+http_clients.configure(host_of(settings.CLAUDE_API_URL), HostLimits(
+    timeout=settings.CLAUDE_HTTP_TIMEOUT,
+    max_connections=settings.CLAUDE_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.CLAUDE_HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=settings.CLAUDE_HTTP_KEEPALIVE_EXPIRY,
+    http2=settings.CLAUDE_HTTP2,
+))
+http_clients.configure("api.github.com", HostLimits(
+    timeout=settings.GITHUB_HTTP_TIMEOUT,
+    max_connections=settings.GITHUB_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.GITHUB_HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=settings.GITHUB_HTTP_KEEPALIVE_EXPIRY,
+))
+if settings.JIRA_URL:
+    http_clients.configure(host_of(settings.JIRA_URL), HostLimits(
+        timeout=settings.JIRA_HTTP_TIMEOUT,
+        max_connections=settings.JIRA_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.JIRA_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.JIRA_HTTP_KEEPALIVE_EXPIRY,
+    ))
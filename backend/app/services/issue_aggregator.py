@@ -0,0 +1,194 @@
+"""
+Merged GitHub + Jira issue list with stale-while-revalidate caching
+Every configured repository and project is fetched concurrently and normalized into the
+`Issue` shape. Readers get the cached list straight away; once it is older than the fresh
+TTL a single background refresh replaces it, and only past the stale TTL do callers wait.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.github_service import GitHubService
+from app.services.jira_service import JiraService
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("critical", "high", "medium", "low")
+
+# Jira status categories -> dashboard status
+_JIRA_STATUS_CATEGORIES = {"new": "open", "indeterminate": "in-progress", "done": "closed"}
+_JIRA_PRIORITIES = {"highest": "critical", "high": "high", "medium": "medium", "low": "low", "lowest": "low"}
+_GITHUB_PRIORITY_LABELS = {"p0": "critical", "p1": "high", "p2": "medium", "p3": "low"}
+_IN_PROGRESS_LABELS = {"in progress", "in-progress", "wip", "doing"}
+
+
+def _split(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _github_priority(labels: List[str]) -> str:
+    for label in labels:
+        name = label.lower().replace("priority:", "").replace("priority/", "").strip()
+        if name in PRIORITIES:
+            return name
+        if name in _GITHUB_PRIORITY_LABELS:
+            return _GITHUB_PRIORITY_LABELS[name]
+    return "medium"
+
+
+def normalize_github_issue(repository: str, issue: dict) -> dict:
+    labels = [label["name"] for label in issue.get("labels", []) if isinstance(label, dict)]
+    if issue.get("state") == "closed":
+        status = "closed"
+    elif issue.get("assignee") and any(label.lower() in _IN_PROGRESS_LABELS for label in labels):
+        status = "in-progress"
+    else:
+        status = "open"
+    return {
+        "id": f"{repository}#{issue['number']}",
+        "title": issue.get("title", ""),
+        "status": status,
+        "assignee": (issue.get("assignee") or {}).get("login"),
+        "priority": _github_priority(labels),
+        "createdAt": issue.get("created_at", ""),
+        "description": issue.get("body"),
+        "labels": labels,
+    }
+
+
+def normalize_jira_issue(issue: dict) -> dict:
+    fields = issue.get("fields", {})
+    category = ((fields.get("status") or {}).get("statusCategory") or {}).get("key", "new")
+    priority = ((fields.get("priority") or {}).get("name") or "medium").lower()
+    return {
+        "id": issue["key"],
+        "title": fields.get("summary", ""),
+        "status": _JIRA_STATUS_CATEGORIES.get(category, "open"),
+        "assignee": (fields.get("assignee") or {}).get("displayName"),
+        "priority": _JIRA_PRIORITIES.get(priority, "medium"),
+        "createdAt": fields.get("created", ""),
+        "labels": fields.get("labels") or [],
+    }
+
+
+class IssueAggregator:
+    """Caches the merged issue list and refreshes it in the background"""
+
+    def __init__(
+        self,
+        github: GitHubService,
+        jira: JiraService,
+        repositories: List[str],
+        project_keys: List[str],
+        fresh_ttl: float = 60.0,
+        stale_ttl: float = 900.0,
+    ):
+        self.github = github
+        self.jira = jira
+        self.repositories = repositories
+        self.project_keys = project_keys
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        # source ("github:owner/repo" / "jira:KEY") -> normalized issues from its last good fetch
+        self._by_source: Dict[str, List[dict]] = {}
+        self._issues: List[dict] = []
+        self._fetched_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.stats_counts = {"fresh": 0, "stale": 0, "waited": 0, "refreshes": 0, "source_errors": 0}
+
+    def configured(self) -> bool:
+        return bool(self.repositories or self.project_keys)
+
+    async def get_issues(self) -> List[dict]:
+        """Merged issues, from cache where possible"""
+        age = time.monotonic() - self._fetched_at if self._fetched_at is not None else None
+        if age is not None and age < self.fresh_ttl:
+            self.stats_counts["fresh"] += 1
+            return self._issues
+        if age is not None and age < self.stale_ttl:
+            self.stats_counts["stale"] += 1
+            self._start_refresh()
+            return self._issues
+        self.stats_counts["waited"] += 1
+        # Shielded: a caller going away must not cancel the refresh others are waiting on
+        await asyncio.shield(self._start_refresh())
+        return self._issues
+
+    async def get_stats(self) -> Dict[str, int]:
+        """Counts derived from the cached merged set"""
+        issues = await self.get_issues()
+        statuses = [issue["status"] for issue in issues]
+        return {
+            "totalIssues": len(issues),
+            "openIssues": statuses.count("open"),
+            "closedIssues": statuses.count("closed"),
+            "inProgress": statuses.count("in-progress"),
+        }
+
+    def invalidate(self) -> None:
+        """Make the next read wait for fresh data"""
+        self._fetched_at = None
+
+    async def close(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            **self.stats_counts,
+            "sources": sorted(self._by_source),
+            "issues": len(self._issues),
+            "age_seconds": round(time.monotonic() - self._fetched_at, 1) if self._fetched_at is not None else None,
+            "refreshing": self._refresh_task is not None and not self._refresh_task.done(),
+            "fresh_ttl": self.fresh_ttl,
+            "stale_ttl": self.stale_ttl,
+        }
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+
+    async def _refresh(self) -> None:
+        self.stats_counts["refreshes"] += 1
+        fetches = [self._fetch_github(repo) for repo in self.repositories]
+        fetches += [self._fetch_jira(key) for key in self.project_keys]
+        results = await asyncio.gather(*fetches, return_exceptions=True)
+
+        for result in results:
+            if isinstance(result, BaseException):
+                # Keep the source's previous issues rather than dropping them from the list
+                self.stats_counts["source_errors"] += 1
+                logger.error(f"Error refreshing issues: {result}")
+                continue
+            source, issues = result
+            self._by_source[source] = issues
+
+        self._issues = [issue for issues in self._by_source.values() for issue in issues]
+        self._fetched_at = time.monotonic()
+
+    async def _fetch_github(self, repository: str) -> Tuple[str, List[dict]]:
+        owner, _, repo = repository.partition("/")
+        issues = await self.github.get_issues(owner, repo, state=settings.GITHUB_ISSUE_STATE)
+        # The issues endpoint also lists pull requests
+        return f"github:{repository}", [
+            normalize_github_issue(repository, issue) for issue in issues if "pull_request" not in issue
+        ]
+
+    async def _fetch_jira(self, project_key: str) -> Tuple[str, List[dict]]:
+        issues = await self.jira.get_issues(project_key)
+        return f"jira:{project_key}", [normalize_jira_issue(issue) for issue in issues]
+
+
+# Global instance
+issue_aggregator = IssueAggregator(
+    GitHubService(),
+    JiraService(),
+    repositories=_split(settings.GITHUB_REPOSITORIES),
+    project_keys=_split(settings.JIRA_PROJECT_KEYS),
+    fresh_ttl=settings.ISSUES_CACHE_FRESH_TTL,
+    stale_ttl=settings.ISSUES_CACHE_STALE_TTL,
+)
@@ -1,14 +1,28 @@
+import asyncio
+import logging
 import httpx
 from app.config import settings
-from typing import List, Optional
+from app.services.circuit_breaker import circuit_breakers
+from app.services.http_cache import http_cache
+from app.services.http_clients import host_of, http_clients
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional, Sequence
 import base64
 
+logger = logging.getLogger(__name__)
+
+
+def get_jira_client() -> httpx.AsyncClient:
+    # Pooled client for the Jira site from the shared registry (JIRA_HTTP_* limits)
+    return http_clients.client_for(settings.JIRA_URL)
+
+
 class JiraService:
     def __init__(self):
         self.url = settings.JIRA_URL
         self.email = settings.JIRA_EMAIL
         self.api_token = settings.JIRA_API_TOKEN
-        
+
         if self.email and self.api_token:
             credentials = f"{self.email}:{self.api_token}"
             encoded_credentials = base64.b64encode(credentials.encode()).decode()
@@ -20,64 +34,161 @@ class JiraService:
         else:
             self.headers = {}
 
-    async def get_issues(self, project_key: str) -> List[dict]:
+    def _configured(self) -> bool:
+        return bool(self.url and self.email and self.api_token)
+
+    async def get_issues(
+        self,
+        project_key: str,
+        fields: Optional[Sequence[str]] = None,
+        expand_changelog: bool = False,
+    ) -> List[dict]:
         """
-        Fetch issues from a Jira project
+        Fetch all issues from a Jira project (every page)
         """
-        if not self.url or not self.email or not self.api_token:
-            return []
-        
-        jql = f"project = {project_key}"
-        url = f"{self.url}/rest/api/3/search"
-        # Use POST for JQL search as per Jira API v3 requirements
-        data = {
-            "jql": jql,
-            "maxResults": 50,
-            "startAt": 0
+        issues: List[dict] = []
+        async with aclosing(self.iter_issue_pages(project_key, fields, expand_changelog)) as pages:
+            async for page in pages:
+                issues.extend(page)
+        return issues
+
+    async def iter_issues(
+        self,
+        project_key: str,
+        fields: Optional[Sequence[str]] = None,
+        expand_changelog: bool = False,
+    ) -> AsyncIterator[dict]:
+        """
+        Stream issues one at a time as their pages arrive
+        """
+        async with aclosing(self.iter_issue_pages(project_key, fields, expand_changelog)) as pages:
+            async for page in pages:
+                for issue in page:
+                    yield issue
+
+    async def iter_issue_pages(
+        self,
+        project_key: str,
+        fields: Optional[Sequence[str]] = None,
+        expand_changelog: bool = False,
+        jql: Optional[str] = None,
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Stream pages of a JQL search, in order
+
+        Only `fields` (default JIRA_FIELDS) are returned; `expand_changelog`
+        adds each issue's changelog. With JIRA_SEARCH_MODE "token" the
+        enhanced search endpoint is walked by nextPageToken. With "offset" the
+        classic endpoint reports the total, so the pages after the first are
+        fetched concurrently (at most JIRA_PAGE_CONCURRENCY at a time). A page
+        that still fails after retries raises instead of silently ending the stream.
+        """
+        if not self._configured():
+            return
+
+        params = {
+            "jql": jql or f"project = {project_key} ORDER BY created ASC",
+            "fields": ",".join(fields or settings.JIRA_FIELDS.split(",")),
+            "maxResults": settings.JIRA_PAGE_SIZE,
         }
-        
-        async with httpx.AsyncClient() as client:
+        if expand_changelog:
+            params["expand"] = "changelog"
+
+        if settings.JIRA_SEARCH_MODE == "offset":
+            pages = self._iter_offset_pages(params)
+        else:
+            pages = self._iter_token_pages(params)
+        async with aclosing(pages):
+            async for page in pages:
+                yield page
+
+    async def _iter_token_pages(self, params: dict) -> AsyncIterator[List[dict]]:
+        url = f"{self.url}/rest/api/3/search/jql"
+        token: Optional[str] = None
+        for page_number in range(1, settings.JIRA_MAX_PAGES + 1):
+            query = {**params, "nextPageToken": token} if token else params
             try:
-                response = await client.post(url, headers=self.headers, json=data)
-                response.raise_for_status()
-                data = response.json()
-                return data.get("issues", [])
+                data = await self._get(url, query)
             except Exception as e:
-                print(f"Error fetching Jira issues: {e}")
-                print(f"Response: {response.text if 'response' in locals() else 'No response'}")
-                return []
+                logger.error(f"Error fetching Jira issues page {page_number}: {e}")
+                raise
+            yield data.get("issues", [])
+            token = data.get("nextPageToken")
+            if not token or data.get("isLast"):
+                return
+
+    async def _iter_offset_pages(self, params: dict) -> AsyncIterator[List[dict]]:
+        url = f"{self.url}/rest/api/3/search"
+        try:
+            first = await self._get(url, {**params, "startAt": 0})
+        except Exception as e:
+            logger.error(f"Error fetching Jira issues: {e}")
+            raise
+        issues = first.get("issues", [])
+        yield issues
+
+        # The server may cap maxResults below what was asked for
+        page_size = first.get("maxResults") or len(issues)
+        total = first.get("total", 0)
+        if not page_size or total <= page_size:
+            return
+        offsets = range(page_size, min(total, page_size * settings.JIRA_MAX_PAGES), page_size)
+
+        semaphore = asyncio.Semaphore(settings.JIRA_PAGE_CONCURRENCY)
+
+        async def fetch(start_at: int) -> List[dict]:
+            async with semaphore:
+                data = await self._get(url, {**params, "startAt": start_at})
+                return data.get("issues", [])
+
+        tasks = [asyncio.ensure_future(fetch(start_at)) for start_at in offsets]
+        try:
+            # Yield in order; later pages keep downloading meanwhile
+            for start_at, task in zip(offsets, tasks):
+                try:
+                    yield await task
+                except Exception as e:
+                    logger.error(f"Error fetching Jira issues at offset {start_at}: {e}")
+                    raise
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _get(self, url: str, params: dict) -> dict:
+        response = await http_cache.get(get_jira_client(), url, headers=self.headers, params=params)
+        response.raise_for_status()
+        return response.json()
 
     async def assign_issue(self, issue_key: str, assignee: str) -> bool:
         """
         Assign a Jira issue to a user
         """
-        if not self.url or not self.email or not self.api_token:
+        if not self._configured():
             return False
-        
+
         url = f"{self.url}/rest/api/3/issue/{issue_key}/assignee"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.put(url, headers=self.headers, json={"accountId": assignee})
-                response.raise_for_status()
-                return True
-            except Exception as e:
-                print(f"Error assigning Jira issue: {e}")
-                return False
+        try:
+            response = await circuit_breakers.call(
+                host_of(self.url),
+                lambda: get_jira_client().put(url, headers=self.headers, json={"accountId": assignee}),
+            )
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"Error assigning Jira issue: {e}")
+            return False
 
     async def get_project_info(self, project_key: str) -> Optional[dict]:
         """
         Get Jira project information
         """
-        if not self.url or not self.email or not self.api_token:
+        if not self._configured():
             return None
-        
-        url = f"{self.url}/rest/api/3/project/{project_key}"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                print(f"Error fetching Jira project info: {e}")
-                return None
 
+        url = f"{self.url}/rest/api/3/project/{project_key}"
+        try:
+            return await self._get(url, {})
+        except Exception as e:
+            logger.error(f"Error fetching Jira project info: {e}")
+            return None
@@ -0,0 +1,93 @@
+"""
+Process-wide record of which Claude models are reachable
+Models that return 404 are skipped for a cooldown period instead of being re-tried on every request
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Tracks unavailable models with a cooldown and the last model that worked"""
+
+    def __init__(self, cooldown_seconds: float = 600.0):
+        self.cooldown_seconds = cooldown_seconds
+        # model -> (monotonic time it becomes eligible again, reason)
+        self._unavailable: Dict[str, tuple] = {}
+        self.resolved_model: Optional[str] = None
+        self.skipped = 0
+
+    def mark_unavailable(self, model: str, reason: str = "not found") -> None:
+        if model not in self._unavailable:
+            logger.warning(f"Claude model {model} unavailable ({reason}); skipping for {self.cooldown_seconds:.0f}s")
+        self._unavailable[model] = (time.monotonic() + self.cooldown_seconds, reason)
+        if self.resolved_model == model:
+            self.resolved_model = None
+
+    def mark_available(self, model: str) -> None:
+        self._unavailable.pop(model, None)
+        self.resolved_model = model
+
+    def is_available(self, model: str) -> bool:
+        entry = self._unavailable.get(model)
+        if entry is None:
+            return True
+        if entry[0] <= time.monotonic():
+            # Cooldown elapsed; allow the model to be tried again
+            del self._unavailable[model]
+            return True
+        return False
+
+    def filter(self, models: List[str]) -> List[str]:
+        """Drop models known to be unavailable, keeping the original order.
+
+        If every candidate is cooling down the full list is returned so the
+        request still gets a chance (and a real error) instead of failing blind.
+        """
+        available = [m for m in models if self.is_available(m)]
+        self.skipped += len(models) - len(available)
+        return available or list(models)
+
+    async def probe(self, models: List[str], check: Callable[[str], Awaitable[bool]]) -> Dict[str, bool]:
+        """Check all candidate models concurrently and record the results.
+
+        Args:
+            models: Candidate model names, in order of preference
+            check: Coroutine returning True if the model is usable
+
+        Returns:
+            Mapping of model name to availability
+        """
+        unique = list(dict.fromkeys(models))
+        results = await asyncio.gather(*(check(m) for m in unique), return_exceptions=True)
+
+        availability: Dict[str, bool] = {}
+        for model, result in zip(unique, results):
+            if isinstance(result, Exception):
+                # Network problems say nothing about the model itself
+                logger.warning(f"Could not probe Claude model {model}: {result}")
+                continue
+            availability[model] = result
+            if not result:
+                self.mark_unavailable(model, "probe returned 404")
+
+        # Preferred model is the first candidate that answered successfully
+        preferred = next((m for m in unique if availability.get(m)), None)
+        if preferred:
+            self.mark_available(preferred)
+        return availability
+
+    def status(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "resolved_model": self.resolved_model,
+            "cooldown_seconds": self.cooldown_seconds,
+            "skipped_attempts": self.skipped,
+            "unavailable": {
+                model: {"reason": reason, "retry_in_seconds": round(max(0.0, until - now), 1)}
+                for model, (until, reason) in self._unavailable.items()
+            },
+        }
@@ -0,0 +1,172 @@
+"""
+Prompt builder that orders content stable-first for Anthropic prompt caching
+Stable prefixes (system prompt, shared project context) are marked with cache_control breakpoints
+"""
+import hashlib
+import json
+from typing import Dict, Iterator, List, Optional
+
+from app.services.tokens import estimate_tokens
+
+# The API allows at most four cache_control breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+
+
+class BuiltPrompt:
+    """System blocks and messages ready to drop into a Messages API payload"""
+
+    def __init__(self, system: List[Dict], messages: List[Dict], query: Optional[str] = None):
+        self.system = system
+        self.messages = messages
+        # The question as asked, without attached facts or snippets (used for routing)
+        self.query = query if query is not None else self.question
+
+    @property
+    def question(self) -> str:
+        """Text of the final (volatile) user block"""
+        content = self.messages[-1]["content"] if self.messages else ""
+        if isinstance(content, str):
+            return content
+        return content[-1].get("text", "") if content else ""
+
+    @property
+    def prefix_hash(self) -> str:
+        """Stable hash of everything before the final user block"""
+        content = self.messages[-1]["content"] if self.messages else []
+        prefix_blocks = content[:-1] if isinstance(content, list) else []
+        prefix = [self.system, self.messages[:-1], prefix_blocks]
+        return hashlib.sha256(json.dumps(prefix, sort_keys=True).encode()).hexdigest()[:16]
+
+    def fingerprint(self) -> str:
+        """Hash of the full prompt, used to coalesce identical requests"""
+        payload = json.dumps([self.system, self.messages], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class PromptBuilder:
+    """Collects prompt parts and emits them stable-first.
+
+    Order is: system instructions, shared context (issues, sprints, ...), prior
+    conversation turns, then the volatile question with anything attach()ed to it.
+    Each stable section ends with a cache_control breakpoint so a later request
+    sharing that prefix reads it from the prompt cache instead of re-processing it.
+
+    The API does not cache prefixes shorter than a per-model minimum (1024 tokens for
+    Sonnet/Opus, 2048 for Haiku), so a breakpoint is only set once the estimated prefix
+    up to it reaches min_cache_tokens. A first-turn chat with just the system prompt
+    is therefore sent unmarked; the breakpoints appear as context and history grow.
+
+    Example:
+        prompt = (
+            PromptBuilder(system=SYSTEM_MESSAGE)
+            .add_context("Open issues:\\n...")
+            .set_question("What's blocking sprint 2?")
+            .build()
+        )
+    """
+
+    def __init__(self, system: Optional[str] = None, cache: bool = True, min_cache_tokens: int = 1024):
+        self.cache = cache
+        self.min_cache_tokens = min_cache_tokens
+        self._system: List[str] = [system] if system else []
+        self._context: List[str] = []
+        self._history: List[Dict] = []
+        self._attachments: List[str] = []
+        self._question: str = ""
+
+    def add_system(self, text: str) -> "PromptBuilder":
+        self._system.append(text)
+        return self
+
+    def add_context(self, text: str) -> "PromptBuilder":
+        """Add shared context that is identical across requests (cacheable)"""
+        if text:
+            self._context.append(text)
+        return self
+
+    def add_turn(self, role: str, text: str) -> "PromptBuilder":
+        """Add a previous conversation turn ("user" or "assistant")"""
+        self._history.append({"role": role, "content": text})
+        return self
+
+    def attach(self, text: str) -> "PromptBuilder":
+        """Add per-question material (computed facts, retrieved snippets); it is sent in
+        the question block, never cached"""
+        if text:
+            self._attachments.append(text)
+        return self
+
+    def set_question(self, text: str) -> "PromptBuilder":
+        self._question = text
+        return self
+
+    def build(self) -> BuiltPrompt:
+        # Blocks that end a stable section; marked once the whole prompt is laid out
+        cache_points = set()
+
+        def block(text: str, cache_point: bool) -> Dict:
+            item = {"type": "text", "text": text}
+            if cache_point:
+                cache_points.add(id(item))
+            return item
+
+        system = [
+            block(text, cache_point=i == len(self._system) - 1)
+            for i, text in enumerate(self._system)
+        ]
+
+        messages: List[Dict] = []
+        history = [dict(turn) for turn in self._history]
+        context = list(self._context)
+
+        if context and history and history[0]["role"] == "user":
+            # Shared context leads the first user turn so it stays in the cached prefix
+            first = history[0]
+            history[0] = {
+                "role": "user",
+                "content": [block(text, cache_point=i == len(context) - 1) for i, text in enumerate(context)]
+                + [{"type": "text", "text": first["content"]}],
+            }
+            context = []
+
+        if history:
+            # Cache the conversation so far; only the new question is uncached
+            last = history[-1]
+            content = last["content"]
+            if isinstance(content, str):
+                content = [{"type": "text", "text": content}]
+            content[-1] = block(content[-1]["text"], cache_point=True)
+            last["content"] = content
+            messages.extend(history)
+
+        final_content = [block(text, cache_point=i == len(context) - 1) for i, text in enumerate(context)]
+        final_content.append({"type": "text", "text": "\n\n".join(self._attachments + [self._question])})
+        if messages and messages[-1]["role"] == "user":
+            # Keep roles alternating when history ends on a user turn
+            messages[-1]["content"].extend(final_content)
+        else:
+            messages.append({"role": "user", "content": final_content})
+
+        if self.cache:
+            breakpoints = prefix_tokens = 0
+            for item in _text_blocks(system, messages):
+                prefix_tokens += estimate_tokens(item["text"])
+                if (
+                    id(item) in cache_points
+                    and breakpoints < MAX_CACHE_BREAKPOINTS
+                    and prefix_tokens >= self.min_cache_tokens
+                ):
+                    item["cache_control"] = {"type": "ephemeral"}
+                    breakpoints += 1
+        return BuiltPrompt(system=system, messages=messages, query=self._question)
+
+
+def _text_blocks(system: List[Dict], messages: List[Dict]) -> Iterator[Dict]:
+    """Every text block in prompt order (plain-string turns as throwaway blocks)"""
+    yield from system
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            yield {"type": "text", "text": content}
+        else:
+            yield from content
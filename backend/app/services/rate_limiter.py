@@ -0,0 +1,213 @@
+"""
+Adaptive outbound rate limiter for Anthropic API calls
+Token bucket + concurrency cap + bounded wait queue, tuned from anthropic-ratelimit-* response headers
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Header families reported by the Anthropic API (anthropic-ratelimit-<family>-remaining/-reset/-limit)
+RATE_LIMIT_FAMILIES = ("requests", "tokens", "input-tokens", "output-tokens")
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is shed because the queue is full or its deadline would pass"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class AdaptiveRateLimiter:
+    """Shared limiter that queues callers instead of failing them on upstream throttling"""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 50.0,
+        burst: int = 10,
+        max_concurrency: int = 8,
+        max_queue_depth: int = 100,
+        max_wait_seconds: float = 20.0,
+    ):
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._waiting = 0
+        # Waiters take turns through the lock, so the queue is served FIFO
+        self._lock = asyncio.Lock()
+        self._released = asyncio.Event()
+
+        self.admitted = 0
+        self.shed = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self.upstream_limits: Dict[str, Dict[str, Optional[str]]] = {}
+
+    def deadline(self) -> float:
+        """Latest time a request starting now may still be admitted (covers all of its retries)"""
+        return time.monotonic() + self.max_wait_seconds
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Wait for permission to send one request; release it on exit"""
+        await self.acquire(deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """Wait for a slot until deadline (default: max_wait_seconds from now).
+
+        Pass the same deadline for every attempt of a request so its retries share one budget.
+        """
+        if self._waiting >= self.max_queue_depth:
+            self.shed += 1
+            raise RateLimitExceeded(
+                f"Claude request queue is full ({self.max_queue_depth} waiting)",
+                retry_after=self._retry_hint(time.monotonic()),
+            )
+
+        started = time.monotonic()
+        if deadline is None:
+            deadline = started + self.max_wait_seconds
+        self._waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = max(self._blocked_until - now, 0.0)
+                    if delay == 0.0 and self._tokens < 1:
+                        delay = (1 - self._tokens) / self.rate
+                    if delay == 0.0 and self._in_flight < self.max_concurrency:
+                        break
+
+                    if now + delay > deadline:
+                        self.shed += 1
+                        raise RateLimitExceeded(
+                            f"Claude request would wait longer than {self.max_wait_seconds:.0f}s",
+                            retry_after=self._retry_hint(now),
+                        )
+
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        # Only the concurrency cap is in the way; wait for a release
+                        self._released.clear()
+                        try:
+                            await asyncio.wait_for(self._released.wait(), timeout=deadline - now)
+                        except asyncio.TimeoutError:
+                            pass
+
+                self._tokens -= 1
+                self._in_flight += 1
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - started
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait_seen = max(self.max_wait_seen, waited)
+
+    def is_throttled(self) -> bool:
+        """Whether upstream told us to back off (429/529 or an exhausted quota) and the pause is still on"""
+        return self._blocked_until > time.monotonic()
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._released.set()
+
+    def record_response(self, status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Adapt to the rate-limit headers of an upstream response.
+
+        Returns:
+            Seconds to wait before retrying if the response was throttled (429/529), else None
+        """
+        now = time.monotonic()
+        for family in RATE_LIMIT_FAMILIES:
+            prefix = f"anthropic-ratelimit-{family}"
+            remaining = headers.get(f"{prefix}-remaining")
+            if remaining is None:
+                continue
+            reset = headers.get(f"{prefix}-reset")
+            limit = headers.get(f"{prefix}-limit")
+            self.upstream_limits[family] = {"limit": limit, "remaining": remaining, "reset": reset}
+
+            if family == "requests":
+                if limit and _to_float(limit):
+                    self.rate = _to_float(limit) / 60.0
+                # Never believe we have more local tokens than upstream says remain
+                if _to_float(remaining) is not None:
+                    self._tokens = min(self._tokens, _to_float(remaining))
+            if _to_float(remaining) == 0 and reset:
+                self._block_for(_seconds_until(reset), now)
+
+        if status_code not in (429, 529):
+            return None
+
+        self.throttled += 1
+        retry_after = _to_float(headers.get("retry-after") or "")
+        if retry_after is None:
+            # 529 (overloaded) has no retry-after; back off briefly
+            retry_after = 1.0
+        self._block_for(retry_after, now)
+        logger.warning(f"Claude API throttled ({status_code}); pausing requests for {retry_after:.1f}s")
+        return retry_after
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self._waiting,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "tokens_available": round(self._tokens, 2),
+            "requests_per_minute": round(self.rate * 60, 2),
+            "blocked_for_seconds": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "throttled": self.throttled,
+            "avg_wait_seconds": round(self.total_wait / self.admitted, 4) if self.admitted else 0.0,
+            "max_wait_seconds": round(self.max_wait_seen, 4),
+            "upstream_limits": self.upstream_limits,
+        }
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _block_for(self, seconds: Optional[float], now: float) -> None:
+        if seconds and seconds > 0:
+            self._blocked_until = max(self._blocked_until, now + seconds)
+
+    def _retry_hint(self, now: float) -> float:
+        return round(max(self._blocked_until - now, 1.0 / self.rate if self.rate else 1.0), 2)
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds_until(reset: str) -> Optional[float]:
+    """Convert an RFC 3339 reset timestamp into seconds from now"""
+    try:
+        reset_at = datetime.fromisoformat(reset.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (reset_at - datetime.now(timezone.utc)).total_seconds()
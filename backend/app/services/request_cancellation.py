@@ -0,0 +1,57 @@
+"""
+Cancel upstream work when the HTTP client goes away
+Request handlers wrap slow awaitables (Claude calls, AIService recommendations) so a closed chat
+panel or aborted fetch cancels the in-flight upstream request instead of waiting it out
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Non-standard status (nginx convention) for requests the client abandoned
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    """The client disconnected before the awaited work finished"""
+
+
+cancellation_stats: Dict[str, int] = {"watched": 0, "cancelled": 0}
+
+
+async def cancel_on_disconnect(
+    awaitable: Awaitable[Any],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_interval: float = 0.5,
+) -> Any:
+    """Await `awaitable`, cancelling it as soon as `is_disconnected()` reports True.
+
+    Cancellation propagates down to the HTTP request to Anthropic, releasing the
+    rate-limiter slot and connection. Coalesced calls keep running while any
+    other caller still waits on them.
+
+    Args:
+        awaitable: Work to run on behalf of the request
+        is_disconnected: Usually ``request.is_disconnected``
+
+    Raises:
+        ClientDisconnected: The client went away and the work was cancelled
+    """
+    cancellation_stats["watched"] += 1
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                cancellation_stats["cancelled"] += 1
+                logger.info("Client disconnected; cancelling in-flight upstream request")
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise ClientDisconnected()
+    finally:
+        # Also covers the handler itself being cancelled
+        if not task.done():
+            task.cancel()
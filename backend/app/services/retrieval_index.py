@@ -0,0 +1,206 @@
+"""
+In-process BM25 retrieval index over project data
+Issues, sprint user stories, narratives and anomalies are indexed incrementally as they are
+written, so chat prompts can carry only the few snippets relevant to a question
+"""
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.tokens import CHARS_PER_TOKEN
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+)*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "how", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "which", "who", "why",
+    "will", "with", "can", "do", "does", "we", "our", "me", "my", "i", "you", "about", "there",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+class RetrievalIndex:
+    """BM25 index with incremental upserts and per-kind replacement"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # doc_id -> {"kind", "title", "text", "hash", "length"}
+        self._docs: Dict[str, dict] = {}
+        # term -> {doc_id: term frequency}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+
+    def upsert(self, doc_id: str, kind: str, title: str, text: str) -> bool:
+        """Add or update a document; returns False if it was already indexed unchanged"""
+        digest = hashlib.sha1(f"{title}\n{text}".encode()).hexdigest()
+        existing = self._docs.get(doc_id)
+        if existing is not None and existing["hash"] == digest:
+            return False
+        if existing is not None:
+            self.remove(doc_id)
+
+        terms = Counter(tokenize(f"{title} {text}"))
+        for term, tf in terms.items():
+            self._postings[term][doc_id] = tf
+        length = sum(terms.values())
+        self._docs[doc_id] = {
+            "kind": kind, "title": title, "text": text, "hash": digest, "length": length, "terms": list(terms),
+        }
+        self._total_length += length
+        return True
+
+    def remove(self, doc_id: str) -> None:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for term in doc["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= doc["length"]
+
+    def replace_kind(self, kind: str, documents: Iterable[Tuple[str, str, str]]) -> Dict[str, int]:
+        """Make the documents of one kind match `documents` exactly.
+
+        Only new or changed documents are re-tokenized, so re-syncing mostly
+        unchanged data is cheap.
+
+        Args:
+            documents: (doc_id, title, text) tuples
+        """
+        seen = set()
+        changed = 0
+        for doc_id, title, text in documents:
+            seen.add(doc_id)
+            if self.upsert(doc_id, kind, title, text):
+                changed += 1
+        stale = [doc_id for doc_id, doc in self._docs.items() if doc["kind"] == kind and doc_id not in seen]
+        for doc_id in stale:
+            self.remove(doc_id)
+        return {"indexed": changed, "removed": len(stale)}
+
+    def search(self, query: str, k: int = 5, kinds: Optional[Iterable[str]] = None) -> List[dict]:
+        """Top-k documents for a query by BM25 score"""
+        if not self._docs:
+            return []
+        kinds = set(kinds) if kinds else None
+        n_docs = len(self._docs)
+        avg_length = self._total_length / n_docs if n_docs else 0.0
+
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                length = self._docs[doc_id]["length"]
+                norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length) if avg_length else tf + self.k1
+                scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        hits = []
+        for doc_id, score in ranked:
+            doc = self._docs[doc_id]
+            if kinds and doc["kind"] not in kinds:
+                continue
+            hits.append({"id": doc_id, "kind": doc["kind"], "title": doc["title"], "text": doc["text"], "score": round(score, 4)})
+            if len(hits) >= k:
+                break
+        return hits
+
+    def context_for(self, query: str, k: int = 5, token_budget: int = 1200) -> List[str]:
+        """Snippets for the top-k hits, trimmed to fit the token budget"""
+        remaining = token_budget * CHARS_PER_TOKEN
+        snippets = []
+        for hit in self.search(query, k=k):
+            snippet = f"[{hit['kind']}] {hit['title']}: {hit['text']}"
+            if len(snippet) > remaining:
+                if remaining < 80:
+                    break
+                snippet = snippet[: remaining - 3] + "..."
+            snippets.append(snippet)
+            remaining -= len(snippet)
+        return snippets
+
+    def stats(self) -> Dict:
+        return {
+            "documents": len(self._docs),
+            "terms": len(self._postings),
+            "by_kind": dict(Counter(doc["kind"] for doc in self._docs.values())),
+        }
+
+
+# -- document builders for each data source ----------------------------------
+
+def issue_documents(issues: Iterable[dict]) -> List[Tuple[str, str, str]]:
+    docs = []
+    for issue in issues:
+        labels = ", ".join(issue.get("labels") or [])
+        text = (
+            f"status {issue.get('status')}; priority {issue.get('priority')}; "
+            f"assignee {issue.get('assignee') or 'unassigned'}; labels {labels or 'none'}"
+        )
+        if issue.get("description"):
+            text += f"; {issue['description']}"
+        docs.append((f"issue:{issue.get('id')}", f"Issue {issue.get('id')} {issue.get('title', '')}", text))
+    return docs
+
+
+def sprint_documents(sprints: Iterable[dict]) -> List[Tuple[str, str, str]]:
+    docs = []
+    for sprint in sprints:
+        sprint_name = sprint.get("name", sprint.get("id"))
+        docs.append((
+            f"sprint:{sprint.get('id')}",
+            f"{sprint_name}",
+            f"goal {sprint.get('goal', '')}; {sprint.get('startDate', '')} to {sprint.get('endDate', '')}; "
+            f"progress {sprint.get('progress', 0)}%",
+        ))
+        for story in sprint.get("userStories", []) or []:
+            docs.append(story_document(sprint, story))
+    return docs
+
+
+def story_document(sprint: dict, story: dict) -> Tuple[str, str, str]:
+    criteria = "; ".join(story.get("acceptanceCriteria", []) or [])
+    return (
+        f"story:{sprint.get('id')}:{story.get('id')}",
+        f"{story.get('id')} {story.get('title', '')}",
+        f"{sprint.get('name', sprint.get('id'))}; status {story.get('status')}; "
+        f"{story.get('storyPoints', 0)} points; assignee {story.get('assignee') or 'unassigned'}; "
+        f"{story.get('description', '')} {criteria}".strip(),
+    )
+
+
+def narrative_documents(narratives: Iterable[dict]) -> List[Tuple[str, str, str]]:
+    return [
+        (
+            f"narrative:{n.get('ticketId')}",
+            f"Narrative {n.get('ticketId')} {n.get('ticketTitle', '')}",
+            f"status {n.get('status')}; {n.get('narrative', '')}",
+        )
+        for n in narratives
+    ]
+
+
+def anomaly_documents(anomalies: Iterable[dict]) -> List[Tuple[str, str, str]]:
+    return [
+        (
+            f"anomaly:{a.get('id')}",
+            f"Anomaly {a.get('title', '')}",
+            f"{a.get('type')}; severity {a.get('severity')}; {a.get('description', '')}",
+        )
+        for a in anomalies
+    ]
+
+
+# Global instance
+retrieval_index = RetrievalIndex()
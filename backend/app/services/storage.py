@@ -0,0 +1,430 @@
+"""
+Repository layer for dashboard state, sprints, narratives and anomalies
+Records are served from in-memory primary-key indexes; a pluggable backend decides whether
+they also survive a restart. "memory" keeps nothing beyond the process; "sqlite" writes
+through to a WAL-mode database file, one transaction per batch of changes, committed on a
+worker thread so the event loop isn't blocked (hence the async write methods).
+
+Every write is reported to the change listeners, so uvicorn workers sharing one SQLite
+file can tell each other which namespaces to reload (see reload_namespace).
+"""
+import asyncio
+import base64
+import bisect
+import json
+import sqlite3
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+
+# Repositories and state stores by namespace, and callbacks run after each of their writes
+_stores: Dict[str, Any] = {}
+_change_listeners: List[Callable[[str], None]] = []
+
+
+def add_change_listener(listener: Callable[[str], None]) -> None:
+    _change_listeners.append(listener)
+
+
+async def reload_namespace(namespace: str) -> bool:
+    """Re-read a namespace that another process wrote; False if nothing here uses it"""
+    store = _stores.get(namespace)
+    if store is None:
+        return False
+    await store.reload()
+    return True
+
+
+def _notify(namespace: str) -> None:
+    for listener in _change_listeners:
+        listener(namespace)
+
+
+class MemoryBackend:
+    """Nothing is persisted; every repository starts empty"""
+
+    def load(self, namespace: str) -> List[Tuple[str, Any]]:
+        return []
+
+    async def write(
+        self,
+        namespace: str,
+        upserts: Iterable[Tuple[str, int, Any]] = (),
+        deletes: Iterable[str] = (),
+        clear: bool = False,
+    ) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend:
+    """One table of JSON records keyed by (namespace, key), written in batched transactions"""
+
+    def __init__(self, path: str):
+        self._lock = Lock()
+        # FIFO: commits land in the order the writes were made
+        self._write_order = asyncio.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps readers unblocked; NORMAL only risks the last commit on power loss
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, position INTEGER NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+
+    def load(self, namespace: str) -> List[Tuple[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, data FROM records WHERE namespace = ? ORDER BY position", (namespace,)
+            ).fetchall()
+        return [(key, json.loads(data)) for key, data in rows]
+
+    async def write(
+        self,
+        namespace: str,
+        upserts: Iterable[Tuple[str, int, Any]] = (),
+        deletes: Iterable[str] = (),
+        clear: bool = False,
+    ) -> None:
+        # Encoded here rather than on the thread, where a handler could be mutating a record
+        rows = [(namespace, key, position, json.dumps(value)) for key, position, value in upserts]
+        delete_rows = [(namespace, key) for key in deletes]
+        async with self._write_order:
+            await asyncio.to_thread(self._commit, namespace, rows, delete_rows, clear)
+
+    def _commit(self, namespace: str, rows: List[tuple], delete_rows: List[tuple], clear: bool) -> None:
+        with self._lock, self._conn:  # one transaction; rolled back if any statement fails
+            if clear:
+                self._conn.execute("DELETE FROM records WHERE namespace = ?", (namespace,))
+            self._conn.executemany("DELETE FROM records WHERE namespace = ? AND key = ?", delete_rows)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records (namespace, key, position, data) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class Repository:
+    """Records indexed by their primary key, in insertion order"""
+
+    def __init__(self, namespace: str, key_field: str, backend):
+        self.namespace = namespace
+        self.key_field = key_field
+        self.backend = backend
+        self._items: Dict[str, dict] = {}
+        self._positions: Dict[str, int] = {}
+        self._next_position = 0
+        self._all: Optional[List[dict]] = None
+        for key, item in backend.load(namespace):
+            self._add(key, item)
+        _stores[namespace] = self
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._items.get(key)
+
+    def all(self) -> List[dict]:
+        """Every record in insertion order. The list is rebuilt only after a write."""
+        if self._all is None:
+            self._all = list(self._items.values())
+        return self._all
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def replace_all(self, items: Iterable[dict]) -> None:
+        """Swap in a new set of records, persisted as one transaction"""
+        items = list(items)
+        self._reset()
+        for item in items:
+            self._add(self._key(item), item)
+        await self.backend.write(self.namespace, self._rows(self._items), clear=True)
+        _notify(self.namespace)
+
+    async def put_many(self, items: Iterable[dict]) -> None:
+        """Insert or update records, persisted as one transaction"""
+        changed: Dict[str, dict] = {}
+        for item in items:
+            key = self._key(item)
+            previous = self._items.get(key)
+            if previous is not None:
+                self._unindex(previous)
+            self._add(key, item)
+            changed[key] = item
+        await self.backend.write(self.namespace, self._rows(changed))
+        _notify(self.namespace)
+
+    async def put(self, item: dict) -> None:
+        await self.put_many([item])
+
+    async def reload(self) -> None:
+        """Rebuild from the backend after another process changed it"""
+        items = await asyncio.to_thread(self.backend.load, self.namespace)
+        self._reset()
+        for key, item in items:
+            self._add(key, item)
+
+    def _reset(self) -> None:
+        self._clear_indexes()
+        self._items.clear()
+        self._positions.clear()
+        self._next_position = 0
+        self._all = None
+
+    def _key(self, item: dict) -> str:
+        return str(item.get(self.key_field))
+
+    def _add(self, key: str, item: dict) -> None:
+        if key not in self._positions:
+            self._positions[key] = self._next_position
+            self._next_position += 1
+        self._items[key] = item
+        self._index(item)
+        self._all = None
+
+    def _rows(self, items: Dict[str, dict]) -> List[Tuple[str, int, Any]]:
+        return [(key, self._positions[key], item) for key, item in items.items()]
+
+    # Secondary-index hooks for subclasses
+    def _index(self, item: dict) -> None:
+        pass
+
+    def _unindex(self, item: dict) -> None:
+        pass
+
+    def _clear_indexes(self) -> None:
+        for item in self._items.values():
+            self._unindex(item)
+
+
+class SprintRepository(Repository):
+    """Sprints by id, plus their user stories by (sprint id, story id)"""
+
+    def __init__(self, namespace: str, backend):
+        self._stories: Dict[str, Dict[str, dict]] = {}
+        super().__init__(namespace, "id", backend)
+
+    def get_story(self, sprint_id: str, story_id: str) -> Optional[dict]:
+        return self._stories.get(sprint_id, {}).get(story_id)
+
+    def _index(self, item: dict) -> None:
+        self._stories[self._key(item)] = {
+            str(story.get("id")): story for story in item.get("userStories", [])
+        }
+
+    def _unindex(self, item: dict) -> None:
+        self._stories.pop(self._key(item), None)
+
+
+SEVERITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+class AnomalyRepository(Repository):
+    """Anomalies by id, with secondary indexes kept up to date on write
+
+    Filters (type, severity, developer, ticket) intersect per-value id sets, and each
+    sortable field keeps a sorted (key, id) list, so a page costs O(matches) with filters
+    and O(log n + limit) without them, instead of a scan of the whole store.
+    """
+
+    FILTER_FIELDS = ("type", "severity", "developer", "ticket")
+    SORT_FIELDS: Dict[str, Callable[[dict], Any]] = {
+        "detectedAt": lambda a: a.get("detectedAt") or "",
+        "severity": lambda a: SEVERITY_RANK.get(a.get("severity"), len(SEVERITY_RANK)),
+        "type": lambda a: a.get("type") or "",
+        "id": lambda a: str(a.get("id")),
+    }
+
+    def __init__(self, namespace: str, backend):
+        # field -> value -> ids
+        self._by_value: Dict[str, Dict[str, Set[str]]] = {field: {} for field in self.FILTER_FIELDS}
+        # sort field ("" is insertion order) -> sorted [(key, id)]
+        self._sorted: Dict[str, List[Tuple[Any, str]]] = {field: [] for field in ("", *self.SORT_FIELDS)}
+        # id -> (filter values, sort entries) as indexed. Records can be changed in place before
+        # they are put() again, so _unindex removes these rather than re-reading the record.
+        self._indexed: Dict[str, Tuple[Dict[str, List[str]], Dict[str, Tuple[Any, str]]]] = {}
+        super().__init__(namespace, "id", backend)
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Iterable[str]]] = None,
+        sort: str = "",
+        descending: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], int, Optional[str]]:
+        """One page of matching anomalies, the number of matches and the cursor for the next page
+
+        Values within a filter are alternatives; different filters must all match.
+        Raises ValueError for an unknown sort field or a malformed cursor.
+        """
+        if sort and sort not in self.SORT_FIELDS:
+            raise ValueError(f"Unknown sort field {sort!r}")
+        ids = self._matching_ids(filters or {})
+        if ids is None:
+            entries = self._sorted[sort]
+        else:
+            entries = sorted(self._sort_entry(sort, key) for key in ids)
+
+        total = len(entries)
+        if cursor is not None:
+            after = self._decode_cursor(cursor)
+            try:
+                start = bisect.bisect_left(entries, after) - 1 if descending else bisect.bisect_right(entries, after)
+            except TypeError as exc:
+                raise ValueError("Cursor does not belong to this sort order") from exc
+        else:
+            start = total - 1 if descending else 0
+
+        positions = range(start, -1, -1) if descending else range(start, total)
+        if limit is not None:
+            positions = positions[:limit]
+        page = [entries[i] for i in positions]
+        has_more = bool(positions) and (positions[-1] > 0 if descending else positions[-1] < total - 1)
+        next_cursor = self._encode_cursor(page[-1]) if has_more else None
+        return [self._items[key] for _, key in page], total, next_cursor
+
+    def _matching_ids(self, filters: Dict[str, Iterable[str]]) -> Optional[Set[str]]:
+        """Ids matching every filter, or None when nothing is filtered"""
+        groups = []
+        for field, values in filters.items():
+            values = [value for value in values or () if value]
+            if not values:
+                continue
+            if field not in self._by_value:
+                raise ValueError(f"Unknown filter {field!r}")
+            index = self._by_value[field]
+            groups.append(set().union(*(index.get(value, ()) for value in values)))
+        if not groups:
+            return None
+        groups.sort(key=len)
+        return groups[0].intersection(*groups[1:])
+
+    def _values(self, item: dict) -> Dict[str, List[str]]:
+        affected = item.get("affectedItems") or {}
+        return {
+            "type": [item.get("type")],
+            "severity": [item.get("severity")],
+            "developer": list(affected.get("developers") or []),
+            "ticket": list(affected.get("tickets") or []),
+        }
+
+    def _sort_entry(self, sort: str, key: str) -> Tuple[Any, str]:
+        if not sort:
+            return (self._positions[key], key)
+        return (self.SORT_FIELDS[sort](self._items[key]), key)
+
+    def _index(self, item: dict) -> None:
+        key = self._key(item)
+        values = self._values(item)
+        sort_entries = {sort: self._sort_entry(sort, key) for sort in self._sorted}
+        self._indexed[key] = (values, sort_entries)
+        for field, field_values in values.items():
+            for value in field_values:
+                if value:
+                    self._by_value[field].setdefault(value, set()).add(key)
+        for sort, entry in sort_entries.items():
+            bisect.insort(self._sorted[sort], entry)
+
+    def _unindex(self, item: dict) -> None:
+        key = self._key(item)
+        indexed = self._indexed.pop(key, None)
+        if indexed is None:
+            return
+        values, sort_entries = indexed
+        for field, field_values in values.items():
+            for value in field_values:
+                ids = self._by_value[field].get(value)
+                if ids is not None:
+                    ids.discard(key)
+                    if not ids:
+                        del self._by_value[field][value]
+        for sort, entry in sort_entries.items():
+            entries = self._sorted[sort]
+            i = bisect.bisect_left(entries, entry)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+
+    def _clear_indexes(self) -> None:
+        self._indexed.clear()
+        for index in self._by_value.values():
+            index.clear()
+        for entries in self._sorted.values():
+            entries.clear()
+
+    @staticmethod
+    def _encode_cursor(entry: Tuple[Any, str]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(entry)).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[Any, str]:
+        try:
+            key, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError) as exc:
+            raise ValueError("Malformed cursor") from exc
+        return (key, item_id)
+
+
+class StateStore(dict):
+    """A dict of top-level fields; writes go through `await store.save(...)` to the backend"""
+
+    def __init__(self, namespace: str, defaults: Dict[str, Any], backend):
+        super().__init__(defaults)
+        self.namespace = namespace
+        self.backend = backend
+        self._fields = list(defaults)
+        dict.update(self, backend.load(namespace))
+        _stores[namespace] = self
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        raise TypeError(f"{self.namespace} state is written with `await save(...)`")
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError(f"{self.namespace} state is written with `await save(...)`")
+
+    async def save(self, changes: Dict[str, Any]) -> None:
+        """Set several fields in one transaction"""
+        dict.update(self, changes)
+        rows = [(key, self._position(key), value) for key, value in changes.items()]
+        await self.backend.write(self.namespace, rows)
+        _notify(self.namespace)
+
+    async def reload(self) -> None:
+        """Pick up fields another process wrote"""
+        dict.update(self, await asyncio.to_thread(self.backend.load, self.namespace))
+
+    def _position(self, key: str) -> int:
+        if key not in self._fields:
+            self._fields.append(key)
+        return self._fields.index(key)
+
+
+def create_backend(kind: str, sqlite_path: str):
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path)
+    if kind != "memory":
+        raise ValueError(f"Unknown STORAGE_BACKEND {kind!r} (expected 'memory' or 'sqlite')")
+    return MemoryBackend()
+
+
+# Global instances
+storage_backend = create_backend(settings.STORAGE_BACKEND, settings.STORAGE_SQLITE_PATH)
+
+dashboard_state = StateStore("dashboard", {
+    "issues": [],
+    "last_updated": None,
+    "repository": None,
+    "srs_document": None,
+}, storage_backend)
+srs_state = StateStore("srs", {"srs_document": None, "last_updated": None}, storage_backend)
+
+sprint_repository = SprintRepository("sprints", storage_backend)
+narrative_repository = Repository("narratives", "ticketId", storage_backend)
+anomaly_repository = AnomalyRepository("anomalies", storage_backend)
@@ -0,0 +1,233 @@
+"""
+In-process telemetry for Claude calls
+Records time-to-first-byte, latency, token usage, fallback attempts and errors per model and
+caller route; exported in Prometheus text format and as rolling percentile summaries
+"""
+import asyncio
+import bisect
+import functools
+import math
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+# ASGI scope of the HTTP request being handled; set by RouteContextMiddleware
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def current_route() -> str:
+    """Route template of the current request (e.g. /api/issues/{issue_id}/recommend)"""
+    scope = current_scope.get()
+    if scope is None:
+        return "background"
+    path = scope.get("path", "unknown")
+    # Put the templates back for path parameters (set by the router) to keep label cardinality low
+    params = {str(value): name for name, value in (scope.get("path_params") or {}).items()}
+    if not params:
+        return path
+    return "/".join(f"{{{params[segment]}}}" if segment in params else segment for segment in path.split("/"))
+
+
+class Histogram:
+    """Cumulative-bucket histogram, Prometheus style"""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Labelled counters and histograms with Prometheus text exposition"""
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        self._counters[name][_labels(labels)] += value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        histogram = self._histograms[name].get(key)
+        if histogram is None:
+            histogram = self._histograms[name][key] = Histogram()
+        histogram.observe(value)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, series in sorted(self._counters.items()):
+            self._header(lines, name, "counter")
+            for labels, value in series.items():
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for name, series in sorted(self._histograms.items()):
+            self._header(lines, name, "histogram")
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = max(0, math.ceil(q * len(sorted_values)) - 1)
+    return round(sorted_values[index], 4)
+
+
+class AITelemetry:
+    """Claude call metrics: a cumulative registry plus a rolling window of recent calls"""
+
+    def __init__(self, window_seconds: float = 900.0, max_samples: int = 10_000):
+        self.window_seconds = window_seconds
+        self.registry = MetricsRegistry()
+        # (timestamp, model, route, latency, ttfb, error class or "", usage)
+        self._samples: Deque[tuple] = deque(maxlen=max_samples)
+
+        self.registry.describe("claude_requests_total", "Claude calls by model, route and outcome")
+        self.registry.describe("claude_errors_total", "Failed Claude calls by error class")
+        self.registry.describe("claude_request_latency_seconds", "Total Claude call latency, including retries")
+        self.registry.describe("claude_ttfb_seconds", "Time to first byte (first token for streams)")
+        self.registry.describe("claude_tokens_total", "Tokens by type, including prompt-cache reads and writes")
+        self.registry.describe("claude_fallback_attempts_total", "Models skipped (404) before the answering model")
+        self.registry.describe("ai_service_operations_total", "AIService operations by result source")
+        self.registry.describe("ai_service_operation_seconds", "AIService operation latency")
+
+    def record_call(
+        self,
+        model: str,
+        latency: float,
+        ttfb: Optional[float] = None,
+        usage: Optional[Dict[str, int]] = None,
+        error: Optional[str] = None,
+        fallback_attempts: int = 0,
+        stream: bool = False,
+        route: Optional[str] = None,
+    ) -> None:
+        """Record one Claude call (all model fallbacks and retries included)"""
+        route = route or current_route()
+        labels = {"model": model, "route": route}
+        outcome = "error" if error else "success"
+        self.registry.inc("claude_requests_total", outcome=outcome, stream=str(stream).lower(), **labels)
+        if error:
+            self.registry.inc("claude_errors_total", error=error, **labels)
+        self.registry.observe("claude_request_latency_seconds", latency, **labels)
+        if ttfb is not None:
+            self.registry.observe("claude_ttfb_seconds", ttfb, **labels)
+        for kind, count in (usage or {}).items():
+            if count:
+                self.registry.inc("claude_tokens_total", count, type=kind, **labels)
+        if fallback_attempts:
+            self.registry.inc("claude_fallback_attempts_total", fallback_attempts, **labels)
+        self._samples.append((time.time(), model, route, latency, ttfb, error or "", dict(usage or {})))
+
+    def record_operation(self, operation: str, latency: float, source: str) -> None:
+        """Record an AIService operation and where its answer came from (claude, local, error)"""
+        self.registry.inc("ai_service_operations_total", operation=operation, source=source)
+        self.registry.observe("ai_service_operation_seconds", latency, operation=operation)
+
+    def timed(self, operation: str, source_of: Optional[Callable[[Any], str]] = None) -> Callable:
+        """Decorator recording an async operation's latency and result source.
+
+        By default the source is the result's "source" key (claude or local).
+        """
+        def decorator(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                source = "error"
+                try:
+                    result = await fn(*args, **kwargs)
+                    if source_of is not None:
+                        source = source_of(result)
+                    else:
+                        source = result.get("source", "ok") if isinstance(result, dict) else "ok"
+                    return result
+                except asyncio.CancelledError:
+                    source = "cancelled"
+                    raise
+                finally:
+                    self.record_operation(operation, time.perf_counter() - started, source)
+            return wrapper
+        return decorator
+
+    def render(self) -> str:
+        return self.registry.render()
+
+    def summary(self, minutes: Optional[float] = None) -> Dict[str, Any]:
+        """p50/p95/p99 latency and TTFB, error rate and tokens per model and route over a window"""
+        window = minutes * 60 if minutes else self.window_seconds
+        cutoff = time.time() - window
+        groups: Dict[Tuple[str, str], List[tuple]] = defaultdict(list)
+        for sample in self._samples:
+            if sample[0] >= cutoff:
+                groups[(sample[1], sample[2])].append(sample)
+
+        series = []
+        for (model, route), samples in sorted(groups.items()):
+            latencies = sorted(s[3] for s in samples)
+            ttfbs = sorted(s[4] for s in samples if s[4] is not None)
+            errors = defaultdict(int)
+            tokens: Dict[str, int] = defaultdict(int)
+            for s in samples:
+                if s[5]:
+                    errors[s[5]] += 1
+                for kind, count in s[6].items():
+                    tokens[kind] += count
+            series.append({
+                "model": model,
+                "route": route,
+                "calls": len(samples),
+                "error_rate": round(sum(errors.values()) / len(samples), 4),
+                "errors": dict(errors),
+                "latency_seconds": {f"p{int(q * 100)}": _percentile(latencies, q) for q in (0.5, 0.95, 0.99)},
+                "ttfb_seconds": {f"p{int(q * 100)}": _percentile(ttfbs, q) for q in (0.5, 0.95, 0.99)},
+                "tokens": dict(tokens),
+            })
+        return {"window_seconds": window, "series": series}
+
+
+# Global instance
+ai_telemetry = AITelemetry(
+    window_seconds=settings.CLAUDE_METRICS_WINDOW_MINUTES * 60,
+    max_samples=settings.CLAUDE_METRICS_MAX_SAMPLES,
+)
@@ -0,0 +1,10 @@
+"""
+Rough token arithmetic for sizing prompts without a tokenizer
+"""
+
+# ~4 characters per token for English text and JSON
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
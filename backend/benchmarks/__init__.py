@@ -0,0 +1 @@
+# Load-test harness for the AI pipeline
@@ -0,0 +1,182 @@
+"""
+Load-test driver for the chat route
+Runs closed-loop virtual users against /api/chat (or /api/chat/stream) at increasing
+concurrency and reports throughput, latency percentiles and error rate per level.
+
+    python -m benchmarks.load_chat --concurrency 50,100,250,500 --requests 2000
+    python -m benchmarks.load_chat --stream --duration 30 --json results.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+# Mix of questions that route to the fast and quality tiers; none match the local fast path
+QUESTIONS = [
+    "What should the team focus on next?",
+    "Who could pick up the open authentication work?",
+    "Summarize the risks in the current sprint.",
+    "Explain why the dashboard bugs keep slipping and what we should change.",
+    "Draft a short status update for stakeholders.",
+    "Compare the workload of the backend and frontend developers.",
+]
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+class LevelResult:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.latencies: List[float] = []
+        self.ttfbs: List[float] = []
+        self.statuses: Counter = Counter()
+        self.elapsed = 0.0
+
+    def report(self) -> Dict:
+        latencies = sorted(self.latencies)
+        ttfbs = sorted(self.ttfbs)
+        total = sum(self.statuses.values())
+        errors = total - self.statuses.get("200", 0)
+        row = {
+            "concurrency": self.concurrency,
+            "requests": total,
+            "throughput_rps": round(self.statuses.get("200", 0) / self.elapsed, 2) if self.elapsed else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "statuses": dict(self.statuses),
+        }
+        for q in (0.5, 0.95, 0.99):
+            value = percentile(latencies, q)
+            row[f"p{int(q * 100)}_ms"] = round(value * 1000, 1) if value is not None else None
+        if ttfbs:
+            row["ttfb_p50_ms"] = round(percentile(ttfbs, 0.5) * 1000, 1)
+            row["ttfb_p99_ms"] = round(percentile(ttfbs, 0.99) * 1000, 1)
+        return row
+
+
+async def _one_request(client: httpx.AsyncClient, args: argparse.Namespace, n: int, result: LevelResult) -> None:
+    question = random.choice(QUESTIONS)
+    if args.unique:
+        # Defeat the response cache and single-flight so every request reaches the mock API
+        question = f"{question} (request {n})"
+    body = {"question": question}
+    started = time.perf_counter()
+    try:
+        if args.stream:
+            async with client.stream("POST", "/api/chat/stream", json=body) as response:
+                first = None
+                async for line in response.aiter_lines():
+                    if first is None and line.startswith("data:"):
+                        first = time.perf_counter() - started
+                    if line.startswith("event: error"):
+                        result.statuses["stream_error"] += 1
+                        return
+                if first is not None:
+                    result.ttfbs.append(first)
+                status = str(response.status_code)
+        else:
+            response = await client.post("/api/chat", json=body)
+            status = str(response.status_code)
+    except httpx.TimeoutException:
+        status = "timeout"
+    except httpx.HTTPError as exc:
+        status = type(exc).__name__
+    result.statuses[status] += 1
+    if status == "200":
+        result.latencies.append(time.perf_counter() - started)
+
+
+async def run_level(args: argparse.Namespace, concurrency: int) -> LevelResult:
+    result = LevelResult(concurrency)
+    counter = itertools.count()
+    deadline = time.monotonic() + args.duration if args.duration else None
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        async def user() -> None:
+            while True:
+                n = next(counter)
+                if deadline is None and n >= args.requests:
+                    return
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+                await _one_request(client, args, n, result)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _print_table(rows: List[Dict]) -> None:
+    columns = ["concurrency", "requests", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "error_rate"]
+    if any("ttfb_p50_ms" in row for row in rows):
+        columns += ["ttfb_p50_ms", "ttfb_p99_ms"]
+    print(" ".join(f"{c:>14}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{str(row.get(c, '-')):>14}" for c in columns))
+    for row in rows:
+        failed = {k: v for k, v in row["statuses"].items() if k != "200"}
+        if failed:
+            print(f"  c={row['concurrency']}: non-200 responses {failed}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    rows = []
+    async with httpx.AsyncClient(base_url=args.url, timeout=10) as client:
+        # Fail fast if the backend is not up
+        (await client.get("/health")).raise_for_status()
+
+    for concurrency in args.concurrency:
+        result = await run_level(args, concurrency)
+        rows.append(result.report())
+        print(f"c={concurrency}: {rows[-1]['requests']} requests in {result.elapsed:.1f}s")
+
+    print()
+    _print_table(rows)
+
+    output = {"rows": rows}
+    if args.server_metrics:
+        async with httpx.AsyncClient(base_url=args.url, timeout=10) as client:
+            summary = (await client.get("/api/ai/metrics/summary", params={"minutes": 60})).json()
+            limiter = (await client.get("/api/ai/rate-limit")).json()
+        output["upstream"] = summary.get("series", [])
+        output["rate_limit"] = limiter.get("rate_limit", {})
+        print("\nUpstream Claude calls (backend telemetry):")
+        for series in output["upstream"]:
+            print(f"  {series['model']} {series['route']}: {series['calls']} calls, "
+                  f"p99 {series['latency_seconds']['p99']}s, error rate {series['error_rate']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the chat route")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend base URL")
+    parser.add_argument("--concurrency", default="50,100,250,500",
+                        type=lambda s: [int(c) for c in s.split(",")], help="Comma-separated virtual user counts")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per level (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds per level instead of a request count")
+    parser.add_argument("--stream", action="store_true", help="Use /api/chat/stream and record time to first event")
+    parser.add_argument("--no-unique", dest="unique", action="store_false",
+                        help="Repeat identical questions (exercises the response cache)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--server-metrics", action="store_true", help="Also print the backend's Claude telemetry")
+    parser.add_argument("--json", help="Write results to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,190 @@
+"""
+Mock Anthropic Messages API for load tests
+Answers /v1/messages (plain and streaming) and /v1/models/{id} with configurable latency,
+token pacing and injected 404/429/529 responses, so the AI pipeline can be exercised without
+spending real tokens.
+
+Run it, then point the backend at it:
+
+    python -m benchmarks.mock_anthropic --port 9100 --latency-ms 400 --rate-429 0.02
+    CLAUDE_API_URL=http://127.0.0.1:9100/v1/messages ANTHROPIC_API_KEY=mock uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+
+class MockConfig(BaseModel):
+    latency_ms: float = 300.0  # Time to first byte
+    jitter_ms: float = 100.0  # Uniform +/- jitter on the latency
+    tokens_per_second: float = 80.0  # Output pacing; also adds to non-streaming latency
+    output_tokens: int = 60
+    unavailable_models: str = ""  # Comma-separated model ids answered with 404
+    rate_429: float = 0.0  # Share of requests answered with 429 rate_limit_error
+    rate_529: float = 0.0  # Share of requests answered with 529 overloaded_error
+    retry_after: float = 1.0
+    requests_per_minute: int = 4000  # Reported in anthropic-ratelimit-* headers
+
+
+config = MockConfig()
+stats: Counter = Counter()
+app = FastAPI(title="Mock Anthropic Messages API")
+
+WORDS = (
+    "The sprint is on track but two stories are blocked on review. Alice owns the auth work "
+    "and Bob is picking up the dashboard bugs; consider moving one low priority ticket out."
+).split()
+
+
+def _error(status: int, error_type: str, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"type": "error", "error": {"type": error_type, "message": message}}, status_code=status, headers=headers)
+
+
+def _injected_error(model: str) -> Optional[JSONResponse]:
+    if model in {m.strip() for m in config.unavailable_models.split(",") if m.strip()}:
+        stats["404"] += 1
+        return _error(404, "not_found_error", f"model: {model}")
+    roll = random.random()
+    if roll < config.rate_429:
+        stats["429"] += 1
+        return _error(429, "rate_limit_error", "Number of requests has exceeded your rate limit",
+                      {"retry-after": str(config.retry_after)})
+    if roll < config.rate_429 + config.rate_529:
+        stats["529"] += 1
+        return _error(529, "overloaded_error", "Overloaded", {"retry-after": str(config.retry_after)})
+    return None
+
+
+def _ratelimit_headers() -> Dict[str, str]:
+    return {
+        "anthropic-ratelimit-requests-limit": str(config.requests_per_minute),
+        "anthropic-ratelimit-requests-remaining": str(config.requests_per_minute - 1),
+    }
+
+
+async def _first_byte_delay() -> None:
+    delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+    await asyncio.sleep(max(0.0, delay) / 1000)
+
+
+def _output_words(n_tokens: int):
+    return [WORDS[i % len(WORDS)] for i in range(n_tokens)]
+
+
+def _input_tokens(body: dict) -> int:
+    # ~4 characters per token, like the backend's own sizing
+    return len(json.dumps([body.get("system"), body.get("messages")])) // 4
+
+
+@app.post("/v1/messages")
+async def messages(request: Request):
+    body = await request.json()
+    model = body.get("model", "")
+    stats["requests"] += 1
+
+    await _first_byte_delay()
+    error = _injected_error(model)
+    if error is not None:
+        return error
+
+    n_tokens = min(config.output_tokens, int(body.get("max_tokens", config.output_tokens)))
+    usage = {
+        "input_tokens": _input_tokens(body),
+        "output_tokens": n_tokens,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+    }
+    words = _output_words(n_tokens)
+
+    if body.get("stream"):
+        stats["streams"] += 1
+        return StreamingResponse(_stream(model, words, usage), media_type="text/event-stream",
+                                 headers=_ratelimit_headers())
+
+    await asyncio.sleep(n_tokens / config.tokens_per_second)
+    stats["ok"] += 1
+    return JSONResponse({
+        "id": f"msg_mock_{stats['requests']}",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": " ".join(words)}],
+        "stop_reason": "end_turn",
+        "usage": usage,
+    }, headers=_ratelimit_headers())
+
+
+async def _stream(model: str, words, usage: dict) -> AsyncIterator[str]:
+    def event(name: str, data: dict) -> str:
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    yield event("message_start", {"type": "message_start", "message": {
+        "model": model, "usage": {**usage, "output_tokens": 1}}})
+    yield event("content_block_start", {"type": "content_block_start", "index": 0,
+                                        "content_block": {"type": "text", "text": ""}})
+    for i, word in enumerate(words):
+        await asyncio.sleep(1 / config.tokens_per_second)
+        text = word if i == 0 else f" {word}"
+        yield event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                            "delta": {"type": "text_delta", "text": text}})
+    yield event("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                  "usage": {"output_tokens": usage["output_tokens"]}})
+    yield event("message_stop", {"type": "message_stop"})
+    stats["ok"] += 1
+
+
+@app.get("/v1/models/{model_id}")
+async def get_model(model_id: str):
+    if model_id in {m.strip() for m in config.unavailable_models.split(",") if m.strip()}:
+        return _error(404, "not_found_error", f"model: {model_id}")
+    return {"type": "model", "id": model_id, "display_name": model_id, "created_at": "2024-10-22T00:00:00Z"}
+
+
+@app.get("/mock/stats")
+async def get_stats():
+    return {"config": config.model_dump(), "counts": dict(stats), "uptime_seconds": round(time.monotonic() - _started, 1)}
+
+
+@app.post("/mock/config")
+async def update_config(update: dict):
+    """Change latency or error injection while a test is running"""
+    global config
+    config = MockConfig(**{**config.model_dump(), **update})
+    return config.model_dump()
+
+
+@app.post("/mock/reset")
+async def reset_stats():
+    stats.clear()
+    return {"status": "success"}
+
+
+_started = time.monotonic()
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    for name, field in MockConfig.model_fields.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(field.default), default=field.default)
+    args = parser.parse_args()
+
+    global config
+    config = MockConfig(**{name: getattr(args, name) for name in MockConfig.model_fields})
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,97 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import issues, stats, dashboard, chat, srs, narratives, anomalies
+from app.routes import issues, stats, dashboard, chat, srs, narratives, anomalies, ai
 from app.config import settings
 from app.middleware.error_handler import setup_error_handlers
+from app.middleware.request_context import RouteContextMiddleware
+from anthropic_client import probe_models
+from app.services.event_bus import event_bus
+from app.services.http_clients import http_clients
+from app.services.issue_aggregator import issue_aggregator
+from app.services.retrieval_index import (
+    anomaly_documents, issue_documents, narrative_documents, retrieval_index, sprint_documents,
+)
+from app.services.storage import (
+    MemoryBackend, add_change_listener, anomaly_repository, dashboard_state, narrative_repository,
+    reload_namespace, sprint_repository, storage_backend,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _probe_claude_models():
+    try:
+        availability = await probe_models()
+        if availability:
+            logger.info(f"Claude model availability: {availability}")
+    except Exception as e:
+        logger.warning(f"Claude model probe failed: {e}")
+
+
+# Storage namespace -> retrieval documents rebuilt from it
+_RETRIEVAL_SOURCES = {
+    "dashboard": lambda: ("issue", issue_documents(dashboard_state["issues"])),
+    "sprints": lambda: ("sprint", sprint_documents(sprint_repository.all())),
+    "narratives": lambda: ("narrative", narrative_documents(narrative_repository.all())),
+    "anomalies": lambda: ("anomaly", anomaly_documents(anomaly_repository.all())),
+}
+
+
+def _reindex(namespace: str) -> None:
+    source = _RETRIEVAL_SOURCES.get(namespace)
+    if source is not None:
+        retrieval_index.replace_kind(*source())
+
+
+async def _reload_from_other_worker(data: dict) -> None:
+    # Another worker committed to the shared SQLite file; re-read what it changed
+    if await reload_namespace(data["namespace"]):
+        _reindex(data["namespace"])
+
+
+def _share_storage_changes() -> None:
+    """Tell the other workers which namespaces to reload after each local write"""
+    if isinstance(storage_backend, MemoryBackend):
+        if event_bus.mode != "local":
+            logger.warning("EVENT_BUS_MODE is set but STORAGE_BACKEND is 'memory'; workers will share "
+                           "WebSocket broadcasts but not dashboard, sprint or anomaly data")
+        return
+    add_change_listener(lambda namespace: event_bus.notify("storage.changed", {"namespace": namespace}))
+    event_bus.subscribe("storage.changed", _reload_from_other_worker)
+
+
+_share_storage_changes()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open one pooled client per upstream host and reuse them across requests
+    await http_clients.start()
+    # Re-index whatever the storage backend kept from the last run
+    for namespace in _RETRIEVAL_SOURCES:
+        _reindex(namespace)
+    # Relay broadcasts and storage changes to and from the other workers (EVENT_BUS_MODE)
+    await event_bus.start()
+    # Probe in the background so startup isn't blocked on the Claude API
+    probe_task = asyncio.create_task(_probe_claude_models()) if settings.CLAUDE_PROBE_MODELS_ON_STARTUP else None
+    yield
+    if probe_task is not None:
+        probe_task.cancel()
+    await event_bus.close()
+    await issue_aggregator.close()
+    await http_clients.close()
+    storage_backend.close()
+
 
 app = FastAPI(
     title="DevAI Manager API",
     description="AI-powered project management API for GitHub and Jira",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Setup centralized error handling
@@ -22,6 +106,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Lets Claude telemetry label calls with the route that made them
+app.add_middleware(RouteContextMiddleware)
+
 # Include routers
 app.include_router(issues.router, prefix="/api", tags=["issues"])
 app.include_router(stats.router, prefix="/api", tags=["stats"])
@@ -30,6 +117,7 @@ app.include_router(chat.router, prefix="/api", tags=["Chat"])
 app.include_router(srs.router, prefix="/api/srs", tags=["srs"])
 app.include_router(narratives.router, tags=["narratives"])
 app.include_router(anomalies.router, tags=["anomalies"])
+app.include_router(ai.router, tags=["ai"])
 
 @app.get("/")
 async def root():
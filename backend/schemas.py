@@ -1,12 +1,25 @@
 """Pydantic schemas for request/response bodies."""
 
+from typing import Dict, Optional
+
 from pydantic import BaseModel, Field
 
 
 class ChatRequest(BaseModel):
     question: str = Field(..., min_length=1, description="User input question")
+    session_id: Optional[str] = Field(
+        None, max_length=64, description="Chat session to continue; a new session is started if omitted or expired"
+    )
 
 
 class ChatResponse(BaseModel):
     answer: str = Field(..., description="Claude generated answer")
+    model: Optional[str] = Field(None, description="Model that produced the answer")
+    tier: Optional[str] = Field(None, description="Routing tier used (fast or quality)")
+    usage: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Token usage, including cache_read_input_tokens and cache_creation_input_tokens",
+    )
+    cached: bool = Field(False, description="Served from the local response cache")
+    session_id: Optional[str] = Field(None, description="Chat session this answer was recorded in")
 